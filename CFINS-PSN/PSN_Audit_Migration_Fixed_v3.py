@@ -1,75 +1,142 @@
 # PSN Audit-Based Migration Script - Fixed v3 (with proper enable password handling)
 from getpass import getpass
-from netmiko import ConnectHandler
-import tkinter as tk
-from tkinter import filedialog
+from netmiko import ConnectHandler, redispatch
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+from paramiko.ssh_exception import SSHException
+import argparse
+import asyncio
+import atexit
 import json
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
+import queue
+import re
+import select
+import socket
+import sys
 from datetime import datetime
+from pathlib import Path
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import asyncssh
+    ASYNCSSH_AVAILABLE = True
+except ImportError:
+    ASYNCSSH_AVAILABLE = False
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Maximum number of devices processed concurrently
+MAX_WORKERS = 20
+
+# Connect/banner/auth timeout in seconds, so dead or misconfigured devices fail fast
+CONNECT_TIMEOUT = 5
+
+# Send each config block to the channel as a single write (fast_cli sessions only)
+BULK_MODE = True
+
+# Use the asyncssh/asyncio fan-out instead of Netmiko worker threads.
+# The Netmiko path stays the default for platforms whose prompts it handles better.
+USE_ASYNCSSH = False
+ASYNC_CONCURRENCY = 50
+
+# Config output markers: "Invalid input", "Error", and IOS "% Ambiguous/Incomplete" lines
+CONFIG_ERROR_RE = re.compile(r"Invalid|Error|^\s*% ", re.MULTILINE)
+
+# Session logs are block-buffered so concurrent workers don't issue a write per read
+SESSION_LOG_BUFFER = 64 * 1024
+_session_logs = {}
+_session_logs_lock = threading.Lock()
+
+# IOS accepts exec commands from config mode via 'do', so the save can be
+# appended to the last config block instead of costing a separate exchange
+IOS_SAVE_COMMAND = "do write memory"
+# A save is only done once IOS prints [OK] / NX-OS prints "Copy complete"
+SAVE_OK_RE = re.compile(r"\[OK\]|Copy complete")
+
+# PSN05 shows up by server name on IOS and by IP on NX-OS
+PSN05_PROBE_COMMAND = "show run | include PVA-M-ISE-PSN05|172.18.31.102"
+
+# Detected device types keyed by IP, so repeat lookups skip 'show version'.
+# Seeded from the remediation file and a sidecar file kept between runs.
+DEVICE_TYPE_CACHE_FILE = SCRIPT_DIR / "device_type_cache.json"
+_device_type_cache = {}
+_device_type_lock = threading.Lock()
 
 # === Setup Logging ===
 def setup_logging():
     """Setup logging configuration"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    logs_dir = os.path.join(script_dir, "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    logs_dir = SCRIPT_DIR / "logs"
+    logs_dir.mkdir(parents=True, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_filename = os.path.join(logs_dir, f"psn_audit_migration_fixed_v3_{timestamp}.log")
+    log_filename = str(logs_dir / f"psn_audit_migration_fixed_v3_{timestamp}.log")
     
+    # Worker threads only enqueue records; a single listener thread formats
+    # and writes them so file I/O never blocks the SSH workers
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_filename)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The listener's handlers do the real formatting; keep the queued message bare
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename),
-            logging.StreamHandler()
-        ]
+        handlers=[queue_handler]
     )
     return log_filename
 
 def create_results_dir():
     """Create results directory"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    results_base_dir = os.path.join(script_dir, "migration_results")
-    if not os.path.exists(results_base_dir):
-        os.makedirs(results_base_dir)
-    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_dir = os.path.join(results_base_dir, f"migration_fixed_v3_{timestamp}")
-    if not os.path.exists(results_dir):
-        os.makedirs(results_dir)
+    results_dir = SCRIPT_DIR / "migration_results" / f"migration_fixed_v3_{timestamp}"
+    results_dir.mkdir(parents=True, exist_ok=True)
     
-    return results_dir
+    return str(results_dir)
 
 def manual_config_mode(net_connect, commands):
     """Manually handle configuration mode with timing"""
     try:
         # Enter config mode manually
-        print("    Entering configuration mode manually...")
+        logging.info("Entering configuration mode manually...")
         output = net_connect.send_command_timing("configure terminal", delay_factor=2)
         time.sleep(1)
         
         # Check if we're in config mode
         prompt = net_connect.find_prompt()
         if "(config)" not in prompt:
-            print(f"    WARNING: Expected config prompt but got: {prompt}")
+            logging.warning(f"Expected config prompt but got: {prompt}")
         
         # Apply commands one by one
         for cmd in commands:
             if cmd.strip():  # Skip empty commands
-                print(f"      Applying: {cmd}")
+                logging.info(f"Applying: {cmd}")
                 output = net_connect.send_command_timing(cmd, delay_factor=1)
-                if output and "Invalid" not in output and "Error" not in output:
+                if output and not CONFIG_ERROR_RE.search(output):
                     logging.info(f"Command successful: {cmd}")
                 else:
                     logging.warning(f"Command output: {output}")
-                time.sleep(0.5)
         
         # Exit config mode
-        print("    Exiting configuration mode...")
+        logging.info("Exiting configuration mode...")
         net_connect.send_command_timing("end", delay_factor=2)
         time.sleep(1)
         
@@ -84,72 +151,153 @@ def manual_config_mode(net_connect, commands):
             pass
         return False
 
-def get_psn05_removal_commands_ios():
-    """Commands to remove PSN05 from IOS devices"""
-    return [
-        # Remove from server groups
-        "aaa group server tacacs+ ISE-TACACS",
-        "no server name PVA-M-ISE-PSN05",
-        "exit",
+def bulk_send(net_connect, commands, max_wait=60):
+    """Write a whole config block to the SSH channel in one send; returns its output, or None on a config error"""
+    exec_prompt = re.compile(rf"{re.escape(net_connect.base_prompt)}#\s*$")
+    net_connect.write_channel("configure terminal\n" + "\n".join(commands) + "\nend\n")
+
+    # Read through Netmiko so the output also reaches the session log; slow
+    # commands (e.g. a save) only extend the wait, they never end it early
+    output = ""
+    deadline = time.monotonic() + max_wait
+    while not exec_prompt.search(output):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"exec prompt not seen within {max_wait}s after bulk config: {output[-200:]!r}")
+        select.select([net_connect.remote_conn], [], [], 1)
+        output += net_connect.read_channel()
+
+    if CONFIG_ERROR_RE.search(output):
+        logging.warning(f"Bulk config output: {output}")
+        return None
+    logging.info(f"Applied {len(commands)} commands via bulk send")
+    return output
+
+def apply_config_commands(net_connect, commands):
+    """
+    Apply commands in one bulk write (fast_cli) or with send_config_set, falling back to
+    manual config mode only if send_config_set raises
+    Returns the session output (empty from manual mode), or None if the commands failed;
+    raises if a bulk write did not complete, since its state on the device is unknown
+    """
+    commands = [cmd for cmd in commands if cmd.strip()]  # Skip empty commands
+
+    if BULK_MODE and getattr(net_connect, 'fast_cli', False):
+        try:
+            return bulk_send(net_connect, commands)
+        except Exception as e:
+            # The block is already on the channel and may be partly applied, so sending it
+            # again would run the commands twice; fail the device and drop the session instead
+            raise RuntimeError(f"Bulk send failed, config may be partly applied: {e}") from e
+
+    try:
+        output = net_connect.send_config_set(commands, delay_factor=0.1, cmd_verify=False)
+        if CONFIG_ERROR_RE.search(output):
+            logging.warning(f"Config set output: {output}")
+            return None
+        logging.info(f"Applied {len(commands)} commands via send_config_set")
+        return output
+
+    except Exception as e:
+        logging.warning(f"send_config_set failed: {e}, falling back to manual config mode")
+        return "" if manual_config_mode(net_connect, commands) else None
+
+_PSN05_REMOVAL_IOS = (
+    # Remove from server groups
+    "aaa group server tacacs+ ISE-TACACS",
+    "no server name PVA-M-ISE-PSN05",
+    "exit",
 
-        "aaa group server radius ISE-RADIUS",
-        "no server name PVA-M-ISE-PSN05-R",
-        "exit",
+    "aaa group server radius ISE-RADIUS",
+    "no server name PVA-M-ISE-PSN05-R",
+    "exit",
 
-        # Remove server definitions
-        "no tacacs server PVA-M-ISE-PSN05",
-        "no radius server PVA-M-ISE-PSN05-R"
-    ]
+    # Remove server definitions
+    "no tacacs server PVA-M-ISE-PSN05",
+    "no radius server PVA-M-ISE-PSN05-R"
+)
+
+_PSN05_REMOVAL_NXOS = (
+    # Remove from server groups
+    "aaa group server tacacs+ ISE",
+    "no server 172.18.31.102",
+    "exit",
+
+    # Remove tacacs-server host definitions
+    "no tacacs-server host 172.18.31.102"
+)
+
+def get_psn05_removal_commands_ios():
+    """Commands to remove PSN05 from IOS devices"""
+    return _PSN05_REMOVAL_IOS
 
 def get_psn05_removal_commands_nxos():
     """Commands to remove PSN05 from NX-OS devices"""
-    return [
-        # Remove from server groups
-        "aaa group server tacacs+ ISE",
-        "no server 172.18.31.102",
-        "exit",
-
-        # Remove tacacs-server host definitions
-        "no tacacs-server host 172.18.31.102"
-    ]
-
-def check_psn05_present(net_connect, device_type='cisco_ios'):
-    """Check if PSN05 is configured on the device"""
+    return _PSN05_REMOVAL_NXOS
+
+def save_config(net_connect, device_type):
+    """Persist the running config, waiting for the save confirmation and the exec prompt after it"""
     if device_type == 'cisco_nxos':
-        # For NX-OS, check for PSN05 IP address (172.18.31.102)
-        output = net_connect.send_command("show run | include 172.18.31.102")
+        command = "copy running-config startup-config"
     else:
-        # For IOS, check for PSN05 server name
-        output = net_connect.send_command("show run | include PVA-M-ISE-PSN05")
-    return bool(output.strip())
-
-def detect_device_type(device_ip, username, password, enable_password):
-    """Detect if device is Cisco IOS or Nexus"""
-    # Try IOS first
-    device = {
-        'device_type': 'cisco_ios',
-        'ip': device_ip,
-        'username': username,
-        'password': password,
-        'secret': enable_password,
-    }
+        command = "write memory"
+    # NX-OS draws a [####] progress bar first, so a bare '#' is not the end of the copy
+    done_pattern = rf"(?:\[OK\]|Copy complete)[\s\S]*{re.escape(net_connect.base_prompt)}#\s*$"
+    return net_connect.send_command(command, expect_string=done_pattern, read_timeout=60)
 
+def enable_tcp_nodelay(net_connect):
+    """Disable Nagle's algorithm on the SSH socket to cut small-packet latency"""
     try:
-        net_connect = ConnectHandler(**device)
-        version_output = net_connect.send_command("show version")
-        net_connect.disconnect()
-
-        # Check for Nexus indicators
-        if 'NX-OS' in version_output or 'Nexus' in version_output:
-            logging.info(f"Device {device_ip} identified as Cisco Nexus (NX-OS)")
-            return 'cisco_nxos'
-        else:
-            logging.info(f"Device {device_ip} identified as Cisco IOS")
-            return 'cisco_ios'
+        sock = net_connect.remote_conn.get_transport().sock
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except Exception as e:
+        logging.debug(f"Could not set TCP_NODELAY: {e}")
+
+def probe_device(net_connect, device_ip, known_psn05=None):
+    """Detect IOS vs Nexus and check for PSN05 in a single exchange.
+
+    known_psn05 is the PSN05 state recorded by the audit; when both it and
+    the device type are already known no command is sent at all.
+    """
+    with _device_type_lock:
+        known_type = _device_type_cache.get(device_ip)
+
+    if known_type and known_psn05 is not None:
+        logging.info(f"Using audit data for {device_ip}: {known_type}, PSN05 present={known_psn05}")
+        return known_type, known_psn05
+
+    if known_type:
+        output = net_connect.send_command(PSN05_PROBE_COMMAND)
+        return known_type, bool(output.strip())
+
+    try:
+        # Write both commands at once and read until the prompt follows the second one
+        prompt = net_connect.find_prompt()
+        net_connect.write_channel(f"show version\n{PSN05_PROBE_COMMAND}\n")
+        output = net_connect.read_until_pattern(
+            pattern=re.escape(PSN05_PROBE_COMMAND) + r".*" + re.escape(prompt),
+            re_flags=re.DOTALL,
+            read_timeout=30
+        )
+        version_output, _, psn05_output = output.partition(PSN05_PROBE_COMMAND)
+        psn05_lines = psn05_output.strip().splitlines()[:-1]  # Drop trailing prompt
+        has_psn05 = bool(''.join(psn05_lines).strip())
 
     except Exception as e:
         logging.warning(f"Device type detection failed for {device_ip}, defaulting to cisco_ios: {e}")
-        return 'cisco_ios'
+        output = net_connect.send_command(PSN05_PROBE_COMMAND)
+        return 'cisco_ios', bool(output.strip())
+
+    # Check for Nexus indicators
+    if 'NX-OS' in version_output or 'Nexus' in version_output:
+        logging.info(f"Device {device_ip} identified as Cisco Nexus (NX-OS)")
+        device_type = 'cisco_nxos'
+    else:
+        logging.info(f"Device {device_ip} identified as Cisco IOS")
+        device_type = 'cisco_ios'
+
+    with _device_type_lock:
+        _device_type_cache[device_ip] = device_type
+    return device_type, has_psn05
 
 def ensure_enable_mode(net_connect, enable_password=None):
     """Ensure we're in enable mode with better error handling"""
@@ -157,7 +305,7 @@ def ensure_enable_mode(net_connect, enable_password=None):
     logging.info(f"Initial prompt: {prompt}")
 
     if '>' in prompt:
-        print("    Entering enable mode...")
+        logging.info("Entering enable mode...")
         try:
             # Try automatic enable first
             net_connect.enable()
@@ -167,11 +315,11 @@ def ensure_enable_mode(net_connect, enable_password=None):
             if enable_password:
                 # Try manual enable with password
                 try:
-                    net_connect.send_command_timing("enable")
-                    time.sleep(1)
+                    net_connect.write_channel("enable" + net_connect.RETURN)
+                    net_connect.read_until_pattern(pattern=r"[Pp]assword:", read_timeout=20)
                     # Send password when prompted
-                    net_connect.send_command_timing(enable_password, strip_prompt=False, strip_command=False)
-                    time.sleep(2)
+                    net_connect.write_channel(enable_password + net_connect.RETURN)
+                    net_connect.read_until_pattern(pattern=r"[#>]", read_timeout=20)
                 except Exception as manual_e:
                     logging.error(f"Manual enable also failed: {manual_e}")
                     raise Exception(f"Could not enter enable mode: {manual_e}")
@@ -184,8 +332,512 @@ def ensure_enable_mode(net_connect, enable_password=None):
     logging.info(f"Successfully in enable mode: {final_prompt}")
     return True
 
+# === Connection Helpers ===
+class DeviceUnreachable(Exception):
+    """Raised when nothing is listening on the device's SSH port"""
+
+def check_ssh_reachable(device_ip, port=22, timeout=2):
+    """Fail fast on dead hosts before paying for a full Netmiko connect"""
+    try:
+        with socket.create_connection((device_ip, port), timeout=timeout):
+            pass
+    except OSError as e:
+        raise DeviceUnreachable(f"{device_ip}:{port} not reachable: {e}")
+
+def connect_with_retry(device, retries=1, backoff=2):
+    """Open a Netmiko session, retrying transient SSH errors with backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return ConnectHandler(**device)
+        except (NetmikoTimeoutException, NetmikoAuthenticationException):
+            raise
+        except SSHException as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            logging.warning(f"Transient SSH error on {device['ip']}: {e}, retrying in {delay}s")
+            time.sleep(delay)
+
+# === SSH Connection Pool ===
+class ConnectionPool:
+    """Reusable Netmiko sessions keyed by (ip, port, username, device_type)"""
+
+    def __init__(self, idle_timeout=300, max_age=3600):
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self._idle = {}      # key -> (net_connect, last_used)
+        self._created = {}   # id(net_connect) -> creation time
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(device):
+        return (device['ip'], device.get('port', 22), device['username'], device['device_type'])
+
+    def get(self, device):
+        """Return a live idle session for this device, or open a new one"""
+        with self._lock:
+            entry = self._idle.pop(self._key(device), None)
+
+        if entry:
+            net_connect, last_used = entry
+            now = time.monotonic()
+            created = self._created.get(id(net_connect), now)
+            if now - last_used <= self.idle_timeout and now - created <= self.max_age:
+                try:
+                    net_connect.find_prompt()
+                    logging.info(f"Reusing pooled connection to {device['ip']}")
+                    return net_connect
+                except Exception as e:
+                    logging.info(f"Pooled connection to {device['ip']} is stale: {e}")
+            self.discard(net_connect)
+
+        net_connect = connect_with_retry(device)
+        with self._lock:
+            self._created[id(net_connect)] = time.monotonic()
+        return net_connect
+
+    def release(self, device, net_connect):
+        """Return a healthy session to the pool for later reuse"""
+        with self._lock:
+            previous = self._idle.pop(self._key(device), None)
+            self._idle[self._key(device)] = (net_connect, time.monotonic())
+        if previous:
+            self.discard(previous[0])
+
+    def discard(self, net_connect):
+        """Close a session and forget it"""
+        with self._lock:
+            self._created.pop(id(net_connect), None)
+        try:
+            net_connect.disconnect()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Disconnect every idle session in the pool"""
+        with self._lock:
+            entries = list(self._idle.values())
+            self._idle.clear()
+        for net_connect, _ in entries:
+            self.discard(net_connect)
+
+_connection_pool = ConnectionPool()
+
+# === Remediation Data ===
+def load_remediation_data(remediation_file):
+    """Load the remediation JSON, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        with open(remediation_file, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(remediation_file, 'r') as f:
+        return json.load(f)
+
+def substitute_tacacs_key(remediation_data, tacacs_key):
+    """Return a copy of remediation_data with the TACACS key filled in.
+
+    Command lists are frozen into tuples of interned strings and the loaded
+    data is left untouched, so the substitution can safely be rerun.
+    """
+    prepared = {}
+    for device_ip, config_data in remediation_data.items():
+        prepared[device_ip] = dict(config_data)
+        prepared[device_ip]['remediation_commands'] = tuple(
+            sys.intern(cmd.replace('<TACACS_KEY_PLACEHOLDER>', tacacs_key))
+            for cmd in config_data['remediation_commands']
+        )
+    return prepared
+
+def seed_device_type_cache(remediation_data):
+    """Prime the device type cache from the sidecar file and the audit output"""
+    if DEVICE_TYPE_CACHE_FILE.exists():
+        try:
+            with open(DEVICE_TYPE_CACHE_FILE, 'r') as f:
+                _device_type_cache.update(json.load(f))
+        except Exception as e:
+            logging.warning(f"Could not read device type cache {DEVICE_TYPE_CACHE_FILE}: {e}")
+
+    # The audit already logged in to these devices, so its platform wins
+    for device_ip, config_data in remediation_data.items():
+        if config_data.get('device_type') in ('cisco_ios', 'cisco_nxos'):
+            _device_type_cache[device_ip] = config_data['device_type']
+
+    logging.info(f"Device type known for {len(_device_type_cache)} devices before connecting")
+
+def save_device_type_cache():
+    """Persist detected device types so the next run can skip detection"""
+    try:
+        with open(DEVICE_TYPE_CACHE_FILE, 'w') as f:
+            json.dump(_device_type_cache, f, indent=2)
+    except Exception as e:
+        logging.warning(f"Could not write device type cache {DEVICE_TYPE_CACHE_FILE}: {e}")
+
+# === Output Files ===
+def open_session_log(results_dir, device_ip):
+    """Open a block-buffered per-device session log, reused for the whole run"""
+    with _session_logs_lock:
+        if device_ip not in _session_logs:
+            log_path = Path(results_dir, f"session_{device_ip.replace('.', '_')}.log")
+            _session_logs[device_ip] = open(log_path, 'wb', buffering=SESSION_LOG_BUFFER)
+        return _session_logs[device_ip]
+
+def close_session_logs():
+    """Flush and close every session log opened during the run"""
+    with _session_logs_lock:
+        for log_file in _session_logs.values():
+            try:
+                log_file.close()
+            except Exception:
+                pass
+        _session_logs.clear()
+
+def write_json(path, data):
+    """Serialize data in one write, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(payload)
+
+# === Per-Device Processing ===
+def process_device(device_ip, username, password, enable_password, remediation_data, results_dir):
+    """Migrate a single device and return its result record (thread-safe)"""
+    logging.info(f"Starting migration for device: {device_ip}")
+    device_result = {
+        'device_ip': device_ip,
+        'status': 'failed',
+        'actions': [],
+        'device_type': 'UNKNOWN',
+        'error': None
+    }
+
+    net_connect = None
+    try:
+        # Connect as IOS (or the previously detected type); NX-OS is switched
+        # to in-place via redispatch so only one SSH session is opened
+        with _device_type_lock:
+            known_type = _device_type_cache.get(device_ip)
+
+        device = {
+            'device_type': known_type or 'cisco_ios',
+            'ip': device_ip,
+            'username': username,
+            'password': password,
+            'secret': enable_password,  # IMPORTANT: Add enable password here
+            'fast_cli': True,
+            'global_delay_factor': 0.1,
+            'timeout': 30,
+            'conn_timeout': CONNECT_TIMEOUT,
+            'banner_timeout': CONNECT_TIMEOUT,
+            'auth_timeout': CONNECT_TIMEOUT,
+            'session_log': open_session_log(results_dir, device_ip)
+        }
+
+        # Connect to device (reusing a pooled session when one is available)
+        check_ssh_reachable(device_ip)
+        net_connect = _connection_pool.get(device)
+        enable_tcp_nodelay(net_connect)
+
+        # Ensure we're in enable mode
+        ensure_enable_mode(net_connect, enable_password)
+
+        # Detect device type and PSN05 presence on the open session
+        logging.info(f"[{device_ip}] Detecting device type...")
+        known_psn05 = remediation_data.get(device_ip, {}).get('psn05_present')
+        device_type, has_psn05 = probe_device(net_connect, device_ip, known_psn05)
+        if device_type != device['device_type']:
+            redispatch(net_connect, device_type=device_type)
+            device['device_type'] = device_type
+        device_result['device_type'] = device_type
+        logging.info(f"Connected to {device_ip} (device_type: {device_type})")
+
+        needs_psn06 = device_ip in remediation_data
+
+        actions_taken = device_result['actions']
+
+        # On IOS the save rides along with the last config block as 'do write memory'
+        fuse_save = device_type != 'cisco_nxos'
+        saved = False
+
+        # Add PSN06 if needed (from remediation file)
+        if needs_psn06:
+            logging.info(f"[{device_ip}] Adding PSN06 configurations...")
+            config_commands = remediation_data[device_ip]['remediation_commands']
+            save_here = fuse_save and not has_psn05
+            if save_here:
+                config_commands = config_commands + (IOS_SAVE_COMMAND,)
+            output = apply_config_commands(net_connect, config_commands)
+
+            if output is not None:
+                # Only count the fused save once the device confirmed it
+                saved = save_here and bool(SAVE_OK_RE.search(output))
+                actions_taken.append("Added PSN06")
+                logging.info(f"Added PSN06 configurations to {device_ip}")
+            else:
+                raise Exception("Failed to add PSN06 configurations")
+
+        # Remove PSN05 if present
+        if has_psn05:
+            logging.info(f"[{device_ip}] Removing PSN05 configurations...")
+            # Select appropriate removal commands based on device type
+            if device_type == 'cisco_nxos':
+                removal_commands = get_psn05_removal_commands_nxos()
+                logging.info(f"[{device_ip}] Using NX-OS PSN05 removal commands")
+            else:
+                removal_commands = get_psn05_removal_commands_ios()
+                logging.info(f"[{device_ip}] Using IOS PSN05 removal commands")
+
+            if fuse_save:
+                removal_commands = removal_commands + (IOS_SAVE_COMMAND,)
+            output = apply_config_commands(net_connect, removal_commands)
+
+            if output is not None:
+                saved = fuse_save and bool(SAVE_OK_RE.search(output))
+                actions_taken.append("Removed PSN05")
+                logging.info(f"Removed PSN05 configurations from {device_ip}")
+            else:
+                logging.warning(f"Failed to remove PSN05 from {device_ip}")
+
+        # Save configuration if any changes were made
+        if actions_taken:
+            if not saved:
+                logging.info(f"[{device_ip}] Saving configuration...")
+                save_output = save_config(net_connect, device_type)
+                logging.info(f"Configuration saved: {save_output}")
+            device_result['status'] = 'migrated'
+        else:
+            # No changes needed
+            device_result['status'] = 'already_migrated'
+
+        _connection_pool.release(device, net_connect)
+        logging.info(f"Released connection to {device_ip}")
+
+    except (NetmikoTimeoutException, NetmikoAuthenticationException, DeviceUnreachable) as e:
+        # Unreachable or rejected credentials: retrying would only burn time
+        logging.error(f"Failed to reach {device_ip}: {type(e).__name__}: {e}")
+        if net_connect is not None:
+            _connection_pool.discard(net_connect)
+        device_result['error'] = f"{type(e).__name__}: {e}"
+
+    except Exception as e:
+        logging.error(f"Failed to process {device_ip}: {str(e)}")
+        if net_connect is not None:
+            _connection_pool.discard(net_connect)
+        device_result['status'] = 'failed'
+        device_result['error'] = str(e)
+        device_result['device_type'] = 'UNKNOWN'
+
+    return device_result
+
+def record_device_result(results, device_result):
+    """Merge a single device result into the shared results structure"""
+    device_ip = device_result['device_ip']
+    actions = device_result['actions']
+
+    if device_result['status'] == 'failed':
+        results['failed'].append(device_ip)
+        results['details'][device_ip] = {
+            'status': 'failed',
+            'error': device_result['error'],
+            'device_type': device_result['device_type']
+        }
+        return
+
+    if "Added PSN06" in actions:
+        results['psn06_added'].append(device_ip)
+    if "Removed PSN05" in actions:
+        results['psn05_removed'].append(device_ip)
+
+    if device_result['status'] == 'migrated':
+        results['fully_migrated'].append(device_ip)
+    else:
+        results['already_migrated'].append(device_ip)
+
+    results['details'][device_ip] = {
+        'status': device_result['status'],
+        'actions': actions,
+        'device_type': device_result['device_type']
+    }
+
+def report_device_result(completed, total_devices, device_result):
+    """Print a one-line progress update for a finished device"""
+    device_ip = device_result['device_ip']
+    if device_result['status'] == 'failed':
+        print(f"[{completed}/{total_devices}] {device_ip}: ✗ ERROR: {device_result['error']}")
+    elif device_result['status'] == 'migrated':
+        print(f"[{completed}/{total_devices}] {device_ip}: ✓ SUCCESS: {', '.join(device_result['actions'])}")
+    else:
+        print(f"[{completed}/{total_devices}] {device_ip}: ✓ Already migrated (PSN06 present, PSN05 absent)")
+
+# === AsyncSSH Processing ===
+_PROMPT_RE = re.compile(r'[\w\-.()/:]+[#>]\s*$')
+_PASSWORD_RE = re.compile(r'[Pp]assword:\s*$')
+
+async def _read_until(process, pattern, timeout=30):
+    """Read from an interactive shell until the buffer matches pattern"""
+    buffer = ''
+    while not pattern.search(buffer):
+        chunk = await asyncio.wait_for(process.stdout.read(65535), timeout)
+        if not chunk:
+            break
+        buffer += chunk
+    return buffer
+
+async def _run_shell_command(process, command, timeout=30):
+    """Send one exec command and return its output without echo and prompt"""
+    process.stdin.write(command + '\n')
+    output = await _read_until(process, _PROMPT_RE, timeout)
+    return '\n'.join(output.splitlines()[1:-1])
+
+async def _run_config_block(process, commands, exec_prompt_re, timeout=60):
+    """Send a whole config block in one write and wait for the exec prompt"""
+    process.stdin.write("configure terminal\n" + "\n".join(commands) + "\nend\n")
+    output = await _read_until(process, exec_prompt_re, timeout)
+    if CONFIG_ERROR_RE.search(output):
+        logging.warning(f"Config block output: {output}")
+    return output
+
+async def process_device_async(device_ip, semaphore, username, password, enable_password, remediation_data):
+    """Migrate a single device over asyncssh and return its result record"""
+    device_result = {
+        'device_ip': device_ip,
+        'status': 'failed',
+        'actions': [],
+        'device_type': 'UNKNOWN',
+        'error': None
+    }
+
+    async with semaphore:
+        logging.info(f"Starting migration for device: {device_ip} (asyncssh)")
+        try:
+            async with asyncssh.connect(device_ip, username=username, password=password,
+                                        known_hosts=None, client_keys=None) as conn:
+                process = await conn.create_process(term_type='vt100')
+                prompt = (await _read_until(process, _PROMPT_RE)).strip().splitlines()[-1]
+
+                # Enter enable mode if we landed in user exec
+                if prompt.endswith('>'):
+                    process.stdin.write("enable\n")
+                    await _read_until(process, _PASSWORD_RE)
+                    process.stdin.write(enable_password + "\n")
+                    prompt = (await _read_until(process, _PROMPT_RE)).strip().splitlines()[-1]
+                if not prompt.endswith('#'):
+                    raise Exception(f"Could not enter enable mode. Final prompt: {prompt}")
+                exec_prompt_re = re.compile(re.escape(prompt) + r'\s*$')
+
+                await _run_shell_command(process, "terminal length 0")
+                version_output = await _run_shell_command(process, "show version")
+                psn05_output = await _run_shell_command(process, PSN05_PROBE_COMMAND)
+                if 'NX-OS' in version_output or 'Nexus' in version_output:
+                    device_type = 'cisco_nxos'
+                else:
+                    device_type = 'cisco_ios'
+                device_result['device_type'] = device_type
+                logging.info(f"Connected to {device_ip} (device_type: {device_type})")
+
+                actions_taken = device_result['actions']
+
+                if device_ip in remediation_data:
+                    logging.info(f"[{device_ip}] Adding PSN06 configurations...")
+                    commands = [cmd for cmd in remediation_data[device_ip]['remediation_commands'] if cmd.strip()]
+                    await _run_config_block(process, commands, exec_prompt_re)
+                    actions_taken.append("Added PSN06")
+                    logging.info(f"Added PSN06 configurations to {device_ip}")
+
+                if psn05_output.strip():
+                    logging.info(f"[{device_ip}] Removing PSN05 configurations...")
+                    if device_type == 'cisco_nxos':
+                        removal_commands = get_psn05_removal_commands_nxos()
+                    else:
+                        removal_commands = get_psn05_removal_commands_ios()
+                    await _run_config_block(process, removal_commands, exec_prompt_re)
+                    actions_taken.append("Removed PSN05")
+                    logging.info(f"Removed PSN05 configurations from {device_ip}")
+
+                if actions_taken:
+                    logging.info(f"[{device_ip}] Saving configuration...")
+                    save_output = await _run_shell_command(process, "write memory", timeout=60)
+                    logging.info(f"Configuration saved: {save_output}")
+                    device_result['status'] = 'migrated'
+                else:
+                    device_result['status'] = 'already_migrated'
+
+                process.stdin.write("exit\n")
+                logging.info(f"Disconnected from {device_ip}")
+
+        except Exception as e:
+            logging.error(f"Failed to process {device_ip}: {str(e)}")
+            device_result['status'] = 'failed'
+            device_result['error'] = str(e)
+            device_result['device_type'] = 'UNKNOWN'
+
+    return device_result
+
+async def process_devices_async(all_devices, username, password, enable_password, remediation_data):
+    """Fan out over all devices on one event loop, bounded by a semaphore"""
+    semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    return await asyncio.gather(*[
+        process_device_async(device_ip, semaphore, username, password, enable_password, remediation_data)
+        for device_ip in all_devices
+    ])
+
+# === Command Line / Input Selection ===
+def parse_args():
+    """Parse command line arguments for non-interactive runs"""
+    parser = argparse.ArgumentParser(description='PSN Audit-Based Migration Tool (Fixed v3)')
+    parser.add_argument('--remediation-file',
+                        help='Remediation JSON file from the PSN audit')
+    parser.add_argument('--device-file',
+                        help='Complete device list file (one IP per line)')
+    parser.add_argument('--username',
+                        help='SSH username (password from PSN_SSH_PASSWORD or prompt)')
+    parser.add_argument('--tacacs-key-file',
+                        help='File containing the PSN06 TACACS+ key (or set PSN_TACACS_KEY)')
+    return parser.parse_args()
+
+def read_tacacs_key(tacacs_key_file=None):
+    """Read the TACACS+ key from a file, the environment, or a prompt"""
+    if tacacs_key_file:
+        with open(tacacs_key_file, 'r') as f:
+            return f.read().strip()
+    if os.environ.get("PSN_TACACS_KEY"):
+        return os.environ["PSN_TACACS_KEY"]
+    print("\nEnter TACACS+ key for PSN06 server:")
+    return getpass("TACACS+ key: ")
+
+def select_input_files(remediation_file=None, device_file=None):
+    """Fill in missing input files with Tk dialogs, only on an interactive terminal"""
+    if (remediation_file and device_file) or not sys.stdin.isatty():
+        return remediation_file, device_file
+
+    # Imported lazily so headless runs never load Tk
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+
+    if not remediation_file:
+        print("\nSelect the remediation JSON file from the PSN audit:")
+        remediation_file = filedialog.askopenfilename(
+            title="Select remediation JSON file",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+
+    if remediation_file and not device_file:
+        print(f"\nNow select the COMPLETE device list file:")
+        device_file = filedialog.askopenfilename(
+            title="Select device list file",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+
+    root.destroy()
+    return remediation_file, device_file
+
 # === Main Function ===
 def main():
+    args = parse_args()
+
     print("=== PSN Audit-Based Migration Tool (Fixed v3) ===")
     print("This version includes proper enable password handling.\n")
     
@@ -195,57 +847,42 @@ def main():
     logging.info("=== PSN Audit-Based Migration Tool (Fixed v3) Started ===")
     logging.info(f"Results directory created: {results_dir}")
     
-    # Get credentials
+    # Get credentials (arguments/environment first, prompts only when missing)
     print("=== Enter Credentials ===")
-    username = input("Enter SSH username: ").strip()
-    password = getpass("Enter SSH password: ")
-    enable_password = getpass("Enter enable password (press Enter if same as SSH password): ")
+    username = args.username or input("Enter SSH username: ").strip()
+    password = os.environ.get("PSN_SSH_PASSWORD") or getpass("Enter SSH password: ")
+    enable_password = os.environ.get("PSN_ENABLE_PASSWORD")
+    if enable_password is None and sys.stdin.isatty():
+        enable_password = getpass("Enter enable password (press Enter if same as SSH password): ")
     if not enable_password:
         enable_password = password
     
     # Get TACACS key
-    print("\nEnter TACACS+ key for PSN06 server:")
-    tacacs_key = getpass("TACACS+ key: ")
+    tacacs_key = read_tacacs_key(args.tacacs_key_file)
     
     # File selection
-    print("\nSelect the remediation JSON file from the PSN audit:")
-    root = tk.Tk()
-    root.withdraw()
-    remediation_file = filedialog.askopenfilename(
-        title="Select remediation JSON file",
-        filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-    )
+    remediation_file, device_file = select_input_files(args.remediation_file, args.device_file)
     
     if not remediation_file:
         print("No remediation file selected. Exiting.")
         return
     
-    # Load remediation data
-    with open(remediation_file, 'r') as f:
-        remediation_data = json.load(f)
-    logging.info(f"Loaded remediation data for {len(remediation_data)} devices")
-    
-    print(f"\nNow select the COMPLETE device list file:")
-    device_file = filedialog.askopenfilename(
-        title="Select device list file",
-        filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
-    )
-    root.destroy()
-    
     if not device_file:
         print("No device file selected. Exiting.")
         return
     
+    # Load remediation data
+    remediation_data = load_remediation_data(remediation_file)
+    logging.info(f"Loaded remediation data for {len(remediation_data)} devices")
+    
     # Load all devices
     with open(device_file, 'r') as f:
         all_devices = [line.strip() for line in f if line.strip() and not line.startswith('#')]
     logging.info(f"Loaded {len(all_devices)} total devices")
     
     # Replace TACACS key placeholder in remediation commands
-    for device_ip, config_data in remediation_data.items():
-        for i, cmd in enumerate(config_data['remediation_commands']):
-            if '<TACACS_KEY_PLACEHOLDER>' in cmd:
-                config_data['remediation_commands'][i] = f" key {tacacs_key}"
+    remediation_data = substitute_tacacs_key(remediation_data, tacacs_key)
+    seed_device_type_cache(remediation_data)
     
     # Results tracking
     results = {
@@ -257,121 +894,65 @@ def main():
         'details': {}
     }
     
-    # Process all devices
     total_devices = len(all_devices)
-    current_device = 0
-    
-    print(f"\n=== Processing {total_devices} Devices ===\n")
-    
-    for device_ip in all_devices:
-        current_device += 1
-        print(f"[{current_device}/{total_devices}] Processing {device_ip}...")
-        logging.info(f"Starting migration for device: {device_ip}")
 
-        try:
-            # Detect device type first
-            print(f"  Detecting device type...")
-            device_type = detect_device_type(device_ip, username, password, enable_password)
-            print(f"  Device type: {device_type}")
-
-            device = {
-                'device_type': device_type,
-                'ip': device_ip,
-                'username': username,
-                'password': password,
-                'secret': enable_password,  # IMPORTANT: Add enable password here
-                'global_delay_factor': 2,
-                'timeout': 30,
-                'session_log': os.path.join(results_dir, f"session_{device_ip.replace('.', '_')}.log")
-            }
-
-            # Connect to device
-            net_connect = ConnectHandler(**device)
-            logging.info(f"Connected to {device_ip} (device_type: {device_type})")
-            
-            # Ensure we're in enable mode
-            ensure_enable_mode(net_connect, enable_password)
+    if USE_ASYNCSSH and ASYNCSSH_AVAILABLE:
+        # Multiplex all SSH sessions on a single event loop
+        print(f"\n=== Processing {total_devices} Devices (asyncssh, {ASYNC_CONCURRENCY} concurrent) ===\n")
+        device_results = asyncio.run(process_devices_async(
+            all_devices, username, password, enable_password, remediation_data
+        ))
+        for completed, device_result in enumerate(device_results, 1):
+            record_device_result(results, device_result)
+            report_device_result(completed, total_devices, device_result)
+    else:
+        # Process all devices concurrently; each worker returns its own record
+        # and results are merged here in the main thread, so no locking is needed
+        max_workers = max(1, min(MAX_WORKERS, total_devices))
 
-            # Check if PSN05 is present
-            has_psn05 = check_psn05_present(net_connect, device_type)
-            needs_psn06 = device_ip in remediation_data
+        print(f"\n=== Processing {total_devices} Devices ({max_workers} concurrent) ===\n")
 
-            actions_taken = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_device = {
+                executor.submit(
+                    process_device,
+                    device_ip,
+                    username,
+                    password,
+                    enable_password,
+                    remediation_data,
+                    results_dir
+                ): device_ip
+                for device_ip in all_devices
+            }
 
-            # Add PSN06 if needed (from remediation file)
-            if needs_psn06:
-                print(f"  Adding PSN06 configurations...")
-                config_commands = remediation_data[device_ip]['remediation_commands']
-                success = manual_config_mode(net_connect, config_commands)
+            completed = 0
+            for future in as_completed(future_to_device):
+                device_ip = future_to_device[future]
+                try:
+                    device_result = future.result()
+                except Exception as e:
+                    logging.error(f"Thread execution failed for {device_ip}: {e}")
+                    device_result = {
+                        'device_ip': device_ip,
+                        'status': 'failed',
+                        'actions': [],
+                        'device_type': 'UNKNOWN',
+                        'error': str(e)
+                    }
 
-                if success:
-                    actions_taken.append("Added PSN06")
-                    results['psn06_added'].append(device_ip)
-                    logging.info(f"Added PSN06 configurations to {device_ip}")
-                else:
-                    raise Exception("Failed to add PSN06 configurations")
-
-            # Remove PSN05 if present
-            if has_psn05:
-                print(f"  Removing PSN05 configurations...")
-                # Select appropriate removal commands based on device type
-                if device_type == 'cisco_nxos':
-                    removal_commands = get_psn05_removal_commands_nxos()
-                    print(f"    Using NX-OS PSN05 removal commands")
-                else:
-                    removal_commands = get_psn05_removal_commands_ios()
-                    print(f"    Using IOS PSN05 removal commands")
+                record_device_result(results, device_result)
+                completed += 1
+                report_device_result(completed, total_devices, device_result)
 
-                success = manual_config_mode(net_connect, removal_commands)
+        _connection_pool.close_all()
+        close_session_logs()
 
-                if success:
-                    actions_taken.append("Removed PSN05")
-                    results['psn05_removed'].append(device_ip)
-                    logging.info(f"Removed PSN05 configurations from {device_ip}")
-                else:
-                    logging.warning(f"Failed to remove PSN05 from {device_ip}")
-            
-            # Save configuration if any changes were made
-            if actions_taken:
-                print("  Saving configuration...")
-                save_output = net_connect.send_command_timing("write memory", delay_factor=3)
-                logging.info(f"Configuration saved: {save_output}")
-                
-                results['fully_migrated'].append(device_ip)
-                results['details'][device_ip] = {
-                    'status': 'migrated',
-                    'actions': actions_taken,
-                    'device_type': device_type
-                }
-                print(f"  ✓ SUCCESS: {', '.join(actions_taken)}")
-            else:
-                # No changes needed
-                print("  ✓ Already migrated (PSN06 present, PSN05 absent)")
-                results['already_migrated'].append(device_ip)
-                results['details'][device_ip] = {
-                    'status': 'already_migrated',
-                    'actions': [],
-                    'device_type': device_type
-                }
-            
-            net_connect.disconnect()
-            logging.info(f"Disconnected from {device_ip}")
-            
-        except Exception as e:
-            error_msg = f"Failed to process {device_ip}: {str(e)}"
-            print(f"  ✗ ERROR: {str(e)}")
-            logging.error(error_msg)
-            results['failed'].append(device_ip)
-            results['details'][device_ip] = {
-                'status': 'failed',
-                'error': str(e),
-                'device_type': 'UNKNOWN'
-            }
+    save_device_type_cache()
     
     # Save detailed results
     results_file = os.path.join(results_dir, "migration_results.json")
-    with open(results_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    write_json(results_file, results)
     
     # Create summary report
     summary_file = os.path.join(results_dir, "migration_summary.txt")
@@ -5,48 +5,175 @@ Adds PSN01/PSN06, tests authentication, only removes PSN05 if tests pass
 """
 from getpass import getpass
 from netmiko import ConnectHandler
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+from paramiko.ssh_exception import SSHException
 import tkinter as tk
 from tkinter import filedialog
 import logging
+import mmap
 import os
 from datetime import datetime
 import time
 import json
+import random
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+log = logging.getLogger("psn.migrate")
+
+# Resolved once so the log file and results directory share one timestamp
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RUN_TS = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+# Maximum number of devices migrated concurrently
+MAX_WORKERS = 32
+
+# Error markers in configuration output (whole words, as IOS prints them)
+CONFIG_ERROR_RE = re.compile(r'\b(Invalid|Error|Unrecognized|Incomplete)\b')
+
+# "tacacs server NAME" followed (within its indented block) by " address ipv4 IP"
+TACACS_SERVER_RE = re.compile(
+    r'^tacacs server (\S+)[ \t]*\n(?:[ \t]+(?!address ipv4 ).*\n)*?[ \t]+address ipv4 (\S+)',
+    re.MULTILINE
+)
+
+# "test aaa" success marker, matched without lower-casing the whole output
+AUTH_OK_RE = re.compile(r'successfully\s+authenticated', re.IGNORECASE)
+
+# PSN05 server names (TACACS+ and RADIUS) being migrated away from
+PSN05_NAMES = frozenset({"PVA-M-ISE-PSN05", "PVA-M-ISE-PSN05-R"})
+PSN05_RE = re.compile(r'PSN05\b')
+
+# RADIUS servers that must be present after migration
+RADIUS_TARGET_NAMES = frozenset({"PVA-M-ISE-PSN01-R", "PVA-M-ISE-PSN06-R"})
+
+# Whole PSN server names in show output (so PSN05 never matches a longer name like PSN050)
+PSN_NAME_RE = re.compile(r'\bPVA-M-ISE-PSN\d+(?:-R)?\b')
+
+# One fetch covering every AAA section the auth checks and PSN05 detection read
+AAA_SECTION_COMMAND = "show running-config | section tacacs server|radius server|aaa group"
+
+# "write memory" is done once the device prints [OK] or returns to the enable prompt
+SAVE_DONE_PATTERN = r"\[OK\]|#\s*$"
+
+# Exponential backoff for transient SSH failures: 1s, 2s, 4s... (+ jitter, capped)
+RETRY_ATTEMPTS = 3
+RETRY_INITIAL_WAIT = 1
+RETRY_MAX_WAIT = 30
+RETRY_JITTER = 0.5
 
 def setup_logging():
     """Setup logging configuration"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    logs_dir = os.path.join(script_dir, "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    logs_dir = os.path.join(SCRIPT_DIR, "logs")
+    os.makedirs(logs_dir, exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_filename = os.path.join(logs_dir, f"psn_migration_auth_test_{timestamp}.log")
+    log_filename = os.path.join(logs_dir, f"psn_migration_auth_test_{RUN_TS}.log")
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename),
-            logging.StreamHandler()
-        ]
-    )
+    # Full detail goes to the log file; the console only shows problems
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_filename)
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+    console_handler.setFormatter(formatter)
+    
+    log.setLevel(logging.INFO)
+    log.addHandler(file_handler)
+    log.addHandler(console_handler)
+    log.propagate = False
     return log_filename
 
 def create_results_dir():
     """Create results directory for test reports"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    results_base_dir = os.path.join(script_dir, "migration_results")
-    if not os.path.exists(results_base_dir):
-        os.makedirs(results_base_dir)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_dir = os.path.join(results_base_dir, f"migration_auth_test_{timestamp}")
-    if not os.path.exists(results_dir):
-        os.makedirs(results_dir)
-    
+    results_dir = os.path.join(SCRIPT_DIR, "migration_results", f"migration_auth_test_{RUN_TS}")
+    os.makedirs(results_dir, exist_ok=True)
     return results_dir
 
+def backoff_delay(attempt):
+    """Exponential backoff with jitter for the given (0-based) retry attempt"""
+    delay = min(RETRY_MAX_WAIT, RETRY_INITIAL_WAIT * (2 ** attempt))
+    return delay + random.uniform(0, RETRY_JITTER)
+
+def is_retryable(error):
+    """Timeouts and transient SSH errors are retried; bad credentials are not"""
+    return isinstance(error, (NetmikoTimeoutException, SSHException)) and \
+        not isinstance(error, NetmikoAuthenticationException)
+
+def connect_with_retry(device):
+    """Connect with backoff, doubling the Netmiko timeout after each failure"""
+    device = dict(device)
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return ConnectHandler(**device)
+        except Exception as e:
+            if not is_retryable(e) or attempt == RETRY_ATTEMPTS - 1:
+                raise
+            delay = backoff_delay(attempt)
+            device['timeout'] = device.get('timeout', 30) * 2
+            log.warning("Connect to %s failed (%s), retrying in %.1fs with timeout %ss",
+                        device['ip'], e, delay, device['timeout'])
+            time.sleep(delay)
+
+def call_with_retry(description, func, *args, **kwargs):
+    """Run a Netmiko call with backoff on timeouts and transient SSH errors"""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e) or attempt == RETRY_ATTEMPTS - 1:
+                raise
+            delay = backoff_delay(attempt)
+            log.warning("%s failed (%s), retrying in %.1fs", description, e, delay)
+            time.sleep(delay)
+
+def send_command_with_retry(net_connect, command, **kwargs):
+    """send_command with backoff on timeouts and transient SSH errors"""
+    return call_with_retry(f"'{command}'", net_connect.send_command, command, **kwargs)
+
+def split_multiline_output(output, commands):
+    """Split send_multiline output into one chunk per command, using the echoes"""
+    chunks = {}
+    positions = []
+    search_from = 0
+    for cmd in commands:
+        index = output.find(cmd, search_from)
+        if index == -1:
+            chunks[cmd] = ''
+            continue
+        positions.append((cmd, index))
+        search_from = index + len(cmd)
+    for i, (cmd, index) in enumerate(positions):
+        end = positions[i + 1][1] if i + 1 < len(positions) else len(output)
+        chunks[cmd] = output[index + len(cmd):end]
+    return chunks
+
+# Interned configuration lines shared by every device and thread (read-only)
+_CMD_CACHE = {}
+_PSN_COMMANDS_CACHE = {}
+
+def _I(line):
+    """Intern a configuration line so every device reuses the same string object"""
+    return _CMD_CACHE.setdefault(line, sys.intern(line))
+
+def get_psn_commands(tacacs_format, server_name, server_ip, tacacs_key, radius_key):
+    """Build the PSN command list once per format and share it across devices"""
+    key = (tacacs_format, server_name, server_ip, tacacs_key, radius_key)
+    commands = _PSN_COMMANDS_CACHE.get(key)
+    if commands is None:
+        builder = get_psn_commands_modern if tacacs_format == "modern" else get_psn_commands_legacy
+        commands = tuple(_I(cmd) for cmd in builder(server_name, server_ip, tacacs_key, radius_key))
+        commands = _PSN_COMMANDS_CACHE.setdefault(key, commands)
+    return commands
+
 def get_psn_commands_legacy(server_name, server_ip, tacacs_key, radius_key):
     """Get PSN server configuration commands using legacy format"""
     return [
@@ -137,7 +264,15 @@ def get_psn05_removal_commands():
         "no radius server PVA-M-ISE-PSN05-R"
     ]
 
-def get_server_ips(net_connect):
+def fetch_aaa_config(net_connect):
+    """Fetch the tacacs/radius server and aaa group sections in one round trip"""
+    try:
+        return send_command_with_retry(net_connect, AAA_SECTION_COMMAND)
+    except Exception as e:
+        log.error("Error fetching AAA configuration: %s", e)
+        return None
+
+def get_server_ips(net_connect, aaa_config=None):
     """
     Get server IP addresses from device configuration
     Parses tacacs server blocks:
@@ -145,164 +280,378 @@ def get_server_ips(net_connect):
      address ipv4 [ip]
      key [key]
      timeout [timeout]
+    Uses aaa_config (from fetch_aaa_config) when given instead of querying the device
     Returns: dict with server names and their IPs
     """
-    server_ips = {}
+    if aaa_config is not None:
+        server_ips = dict(TACACS_SERVER_RE.findall(aaa_config))
+        log.info("Found server IPs: %s", server_ips)
+        return server_ips
     try:
-        # Get TACACS server configurations
-        tacacs_output = net_connect.send_command("show run | section tacacs server")
-        current_server = None
+        # Get TACACS server configurations, parsed by TextFSM when a template matches
+        tacacs_output = send_command_with_retry(
+            net_connect, "show running-config | section tacacs server", use_textfsm=True
+        )
+        if isinstance(tacacs_output, list):
+            server_ips = {
+                row['name']: row.get('ipv4') or row.get('address')
+                for row in tacacs_output
+                if row.get('name') and (row.get('ipv4') or row.get('address'))
+            }
+        else:
+            # No template for this command: fall back to the block regex
+            server_ips = dict(TACACS_SERVER_RE.findall(tacacs_output))
         
-        for line in tacacs_output.split('\n'):
-            line = line.strip()
-            if line.startswith('tacacs server '):
-                # Extract server name: tacacs server SERVER-NAME
-                parts = line.split()
-                if len(parts) >= 3:
-                    current_server = parts[2]
-            elif current_server and line.startswith('address ipv4 '):
-                # Extract IP address: address ipv4 IP-ADDRESS
-                parts = line.split()
-                if len(parts) >= 3:
-                    ip = parts[2]
-                    server_ips[current_server] = ip
-            elif line and not line.startswith(' ') and current_server:
-                # End of current server block if we hit a non-indented line
-                current_server = None
-                    
-        logging.info(f"Found server IPs: {server_ips}")
+        log.info("Found server IPs: %s", server_ips)
         return server_ips
     except Exception as e:
-        logging.error(f"Error getting server IPs: {e}")
+        log.error("Error getting server IPs: %s", e)
         return {}
 
-def test_tacacs_authentication(net_connect, device_ip, test_username, test_password):
+def test_tacacs_authentication(net_connect, device_ip, test_username, test_password, aaa_config=None):
     """
     Test TACACS+ authentication by checking AAA test command
-    Returns: (success, details)
+    Returns: (success, details, server_ips)
     """
-    print("    Testing TACACS+ authentication...")
+    log.info("%s: Testing TACACS+ authentication...", device_ip)
+    server_ips = {}
     try:
         # Get server IP addresses from configuration
-        server_ips = get_server_ips(net_connect)
+        server_ips = get_server_ips(net_connect, aaa_config)
         
         # Test each configured server (skip PSN05 since we're migrating away from it)
+        test_cmds = {
+            server_name: f"test aaa group ISE-TACACS server {server_ip} {test_username} {test_password} legacy"
+            for server_name, server_ip in server_ips.items()
+            if not PSN05_RE.search(server_name)  # Test any PSN server except PSN05
+        }
+        
+        # Send all probes as one batch and split the combined output per probe;
+        # each probe waits on an external TACACS+ round trip, so keep the slow path
         test_results = {}
-        for server_name, server_ip in server_ips.items():
-            if 'PSN05' not in server_name:  # Test any PSN server except PSN05
-                print(f"      Testing {server_name} ({server_ip})...")
-                test_cmd = f"test aaa group ISE-TACACS server {server_ip} {test_username} {test_password} legacy"
-                logging.info(f"Auth test command: {test_cmd}")
-                output = net_connect.send_command(test_cmd, delay_factor=3)
-                logging.info(f"Auth test output: {output}")
-                print(f"        Command: {test_cmd}")
-                print(f"        Output: {output}")
+        if test_cmds:
+            log.info("%s: Testing %s...", device_ip, ', '.join(test_cmds))
+            combined = call_with_retry(
+                f"Auth test batch on {device_ip}",
+                net_connect.send_multiline,
+                [[cmd, r'#'] for cmd in test_cmds.values()],
+                read_timeout=30,
+                delay_factor=2
+            )
+            outputs = split_multiline_output(combined, list(test_cmds.values()))
+            
+            for server_name, test_cmd in test_cmds.items():
+                output = outputs[test_cmd]
+                log.info("Auth test output for %s: %s", server_name, output)
                 
                 # Check if authentication was successful
-                success = "successfully authenticated" in output.lower() or "User was successfully authenticated" in output
-                test_results[server_name] = {'ip': server_ip, 'success': success, 'output': output}
-                print(f"        Result: {'PASS' if success else 'FAIL'}")
+                success = bool(AUTH_OK_RE.search(output))
+                test_results[server_name] = {'ip': server_ips[server_name], 'success': success, 'output': output}
+                log.info("%s: %s result: %s", device_ip, server_name, 'PASS' if success else 'FAIL')
         
         # Check if any non-PSN05 servers are working
         working_servers = [name for name, result in test_results.items() if result['success']]
         
         if working_servers:
             success_msg = f"TACACS+ test passed ({', '.join(working_servers)} responding)"
-            print(f"      ✓ {success_msg}")
-            logging.info(f"{device_ip}: {success_msg}")
-            return True, success_msg
+            log.info("%s: %s", device_ip, success_msg)
+            return True, success_msg, server_ips
         else:
             fail_msg = "TACACS+ test failed - no PSN01/PSN06 response"
-            print(f"      ✗ {fail_msg}")
-            logging.warning(f"{device_ip}: {fail_msg}")
+            log.warning("%s: %s", device_ip, fail_msg)
             for server_name, result in test_results.items():
-                logging.debug(f"Test output for {server_name}: {result['output']}")
-            return False, fail_msg
+                log.debug("Test output for %s: %s", server_name, result['output'])
+            return False, fail_msg, server_ips
             
     except Exception as e:
         error_msg = f"TACACS+ test error: {str(e)}"
-        print(f"      ✗ {error_msg}")
-        logging.error(f"{device_ip}: {error_msg}")
-        return False, error_msg
+        log.error("%s: %s", device_ip, error_msg)
+        return False, error_msg, server_ips
 
-def test_radius_authentication(net_connect, device_ip):
+def test_radius_authentication(net_connect, device_ip, aaa_config=None):
     """
     Test RADIUS authentication 
+    Uses aaa_config (from fetch_aaa_config) when given instead of querying the device
     Returns: (success, details)
     """
-    print("    Testing RADIUS authentication...")
+    log.info("%s: Testing RADIUS authentication...", device_ip)
     try:
         # First check if RADIUS servers are configured and reachable
-        radius_check = net_connect.send_command("show aaa servers | include PVA-M-ISE-PSN")
+        if aaa_config is not None:
+            radius_check = aaa_config
+        else:
+            radius_check = net_connect.send_command("show aaa servers | include PVA-M-ISE-PSN")
         
-        psn01_r_present = "PVA-M-ISE-PSN01-R" in radius_check
-        psn06_r_present = "PVA-M-ISE-PSN06-R" in radius_check
+        found = set(PSN_NAME_RE.findall(radius_check))
+        servers = sorted(name.replace("PVA-M-ISE-", "") for name in found & RADIUS_TARGET_NAMES)
         
-        if psn01_r_present or psn06_r_present:
-            servers = []
-            if psn01_r_present:
-                servers.append("PSN01-R")
-            if psn06_r_present:
-                servers.append("PSN06-R")
+        if servers:
             success_msg = f"RADIUS servers configured ({', '.join(servers)})"
-            print(f"      ✓ {success_msg}")
-            logging.info(f"{device_ip}: {success_msg}")
+            log.info("%s: %s", device_ip, success_msg)
             return True, success_msg
         else:
             fail_msg = "RADIUS test failed - PSN01-R/PSN06-R not found"
-            print(f"      ✗ {fail_msg}")
-            logging.warning(f"{device_ip}: {fail_msg}")
+            log.warning("%s: %s", device_ip, fail_msg)
             return False, fail_msg
             
     except Exception as e:
         error_msg = f"RADIUS test error: {str(e)}"
-        print(f"      ✗ {error_msg}")
-        logging.error(f"{device_ip}: {error_msg}")
+        log.error("%s: %s", device_ip, error_msg)
         return False, error_msg
 
 def apply_config_commands(net_connect, commands):
-    """Apply configuration commands"""
+    """Apply configuration commands as one send_config_set batch"""
+    commands = [cmd for cmd in commands if cmd.strip()]
     try:
-        # Enter config mode
-        print("    Entering configuration mode...")
-        net_connect.config_mode()
-        time.sleep(1)
-        
-        # Apply commands one by one
-        for cmd in commands:
-            if cmd.strip():
-                print(f"      Applying: {cmd}")
-                output = net_connect.send_command_timing(cmd, delay_factor=1)
-                
-                # Check for errors
-                if any(err in output for err in ["Invalid", "Error", "Unrecognized", "Incomplete"]):
-                    logging.error(f"Command error for '{cmd}': {output}")
-                    print(f"        ERROR: {output}")
-                    raise Exception(f"Configuration command failed: {cmd}")
-                else:
-                    logging.info(f"Command successful: {cmd}")
-                    
-                time.sleep(0.5)
+        log.info("Applying %s configuration commands...", len(commands))
+        output = net_connect.send_config_set(commands, cmd_verify=True, read_timeout=30)
         
-        # Exit config mode
-        print("    Exiting configuration mode...")
-        net_connect.exit_config_mode()
-        time.sleep(1)
+        # Check the whole session output for errors in one pass
+        error = CONFIG_ERROR_RE.search(output)
+        if error:
+            log.error("Command error (%s): %s", error.group(0), output)
+            raise Exception(f"Configuration command failed: {error.group(0)}")
         
+        log.info("Commands successful: %s", commands)
         return True
         
     except Exception as e:
-        logging.error(f"Config mode failed: {e}")
+        log.error("Config mode failed: %s", e)
         try:
             net_connect.send_command_timing("end", delay_factor=2)
         except:
             pass
         return False
 
-def check_psn05_present(net_connect):
-    """Check if PSN05 is configured on the device"""
+def save_config(net_connect):
+    """Write memory, returning as soon as the device confirms the save"""
+    return net_connect.send_command("write memory", read_timeout=60, expect_string=SAVE_DONE_PATTERN)
+
+def check_psn05_present(net_connect, server_ips=None, aaa_config=None):
+    """
+    Check if PSN05 is configured on the device
+    Uses the cached AAA sections or the tacacs server names already parsed during
+    auth testing, and only queries the device when neither is available
+    """
+    if aaa_config is not None:
+        return not PSN05_NAMES.isdisjoint(PSN_NAME_RE.findall(aaa_config))
+    if server_ips:
+        return not PSN05_NAMES.isdisjoint(server_ips)
     output = net_connect.send_command("show run | include PVA-M-ISE-PSN05")
-    return bool(output.strip())
+    return not PSN05_NAMES.isdisjoint(PSN_NAME_RE.findall(output))
+
+class SSHPool:
+    """Live Netmiko sessions keyed by device IP, lent out to one worker at a time"""
+
+    def __init__(self, max_per_host=1):
+        self.max_per_host = max_per_host
+        self._pool = {}      # device_ip -> idle handlers
+        self._in_use = {}    # device_ip -> number of handlers lent out
+        self._lock = threading.Condition()
+
+    @staticmethod
+    def _is_healthy(net_connect):
+        try:
+            return net_connect.is_alive() and net_connect.find_prompt().endswith('#')
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(net_connect):
+        try:
+            net_connect.disconnect()
+        except Exception:
+            pass
+
+    def acquire(self, device_ip, device):
+        """Borrow a live session for device_ip, connecting only when none is idle"""
+        with self._lock:
+            while self._in_use.get(device_ip, 0) >= self.max_per_host:
+                self._lock.wait()
+            self._in_use[device_ip] = self._in_use.get(device_ip, 0) + 1
+            idle = self._pool.get(device_ip, [])
+            net_connect = idle.pop() if idle else None
+
+        if net_connect is not None:
+            if self._is_healthy(net_connect):
+                log.info("Reusing pooled session to %s", device_ip)
+                return net_connect
+            self._close(net_connect)
+
+        try:
+            return connect_with_retry(device)
+        except Exception:
+            with self._lock:
+                self._in_use[device_ip] -= 1
+                self._lock.notify_all()
+            raise
+
+    def release(self, device_ip, net_connect, healthy=True):
+        """Return a session to the pool, or close it if it is no longer usable"""
+        with self._lock:
+            self._in_use[device_ip] -= 1
+            if healthy:
+                self._pool.setdefault(device_ip, []).append(net_connect)
+            self._lock.notify_all()
+        if not healthy:
+            self._close(net_connect)
+
+    def close_all(self):
+        """Disconnect every idle session (shutdown phase)"""
+        with self._lock:
+            idle = [conn for conns in self._pool.values() for conn in conns]
+            self._pool.clear()
+        for net_connect in idle:
+            self._close(net_connect)
+
+_ssh_pool = SSHPool()
+
+def dumps_json(data, indent=False):
+    """Serialize to JSON bytes, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None).encode('utf-8')
+
+def append_device_record(ndjson_file, device_ip, device_result):
+    """Append one finished device to the NDJSON log so a crash loses nothing"""
+    with open(ndjson_file, 'ab') as fh:
+        fh.write(dumps_json({device_ip: device_result}) + b'\n')
+
+def record_result(results, results_lock, category, device_ip):
+    """Append a device to a shared results category (thread-safe)"""
+    with results_lock:
+        results[category].append(device_ip)
+
+def process_device(device_ip, username, password, server_name, server_ip, tacacs_key, radius_key,
+                   test_username, test_password, results, results_lock):
+    """Migrate and auth-test a single device; returns (device_ip, device_result)"""
+    log.info("Processing %s...", device_ip)
+    device_result = {
+        'psn_added': False,
+        'auth_test': None,
+        'psn05_removed': False,
+        'error': None
+    }
+    
+    device = {
+        'device_type': 'cisco_ios',
+        'ip': device_ip,
+        'username': username,
+        'password': password,
+        'fast_cli': True,           # prompt-driven pacing for show commands
+        'global_delay_factor': 1,
+        'timeout': 30
+    }
+    
+    net_connect = None
+    try:
+        # Connect (or borrow a live session from the pool)
+        net_connect = _ssh_pool.acquire(device_ip, device)
+        log.info("Connected to %s", device_ip)
+        
+        # Check prompt
+        prompt = net_connect.find_prompt()
+        if '#' not in prompt:
+            log.error("%s: Not in enable mode. Prompt: %s", device_ip, prompt)
+            device_result['error'] = "Not in enable mode"
+            record_result(results, results_lock, 'failed', device_ip)
+            _ssh_pool.release(device_ip, net_connect, healthy=False)
+            with results_lock:
+                results['details'][device_ip] = device_result
+            return device_ip, device_result
+        
+        # Step 1: Detect format and get appropriate PSN commands
+        log.info("%s: Step 1: Detecting device format and adding PSN configurations...", device_ip)
+        tacacs_format = detect_tacacs_format(net_connect)
+        log.info("%s: Detected TACACS format: %s", device_ip, tacacs_format)
+        
+        psn_commands = get_psn_commands(tacacs_format, server_name, server_ip, tacacs_key, radius_key)
+        
+        if apply_config_commands(net_connect, psn_commands):
+            log.info("%s: PSN server %s configured using %s format", device_ip, server_name, tacacs_format)
+            device_result['psn_added'] = True
+            record_result(results, results_lock, 'psn_added', device_ip)
+            
+            # Step 2: Save config before testing
+            log.info("%s: Step 2: Saving configuration...", device_ip)
+            save_config(net_connect)
+            
+            # Step 3: Test authentication (server checks share one config fetch)
+            log.info("%s: Step 3: Testing authentication...", device_ip)
+            aaa_config = fetch_aaa_config(net_connect)
+            tacacs_ok, tacacs_details, server_ips = test_tacacs_authentication(
+                net_connect, device_ip, test_username, test_password, aaa_config
+            )
+            radius_ok, radius_details = test_radius_authentication(net_connect, device_ip, aaa_config)
+            
+            auth_passed = tacacs_ok and radius_ok
+            device_result['auth_test'] = {
+                'passed': auth_passed,
+                'tacacs': {'result': tacacs_ok, 'details': tacacs_details},
+                'radius': {'result': radius_ok, 'details': radius_details}
+            }
+            
+            if auth_passed:
+                log.info("%s: Authentication tests PASSED", device_ip)
+                record_result(results, results_lock, 'auth_test_passed', device_ip)
+                
+                # Step 4: Check and remove PSN05 only if tests passed
+                if check_psn05_present(net_connect, server_ips, aaa_config):
+                    log.info("%s: Step 4: Removing PSN05 (auth tests passed)...", device_ip)
+                    removal_commands = get_psn05_removal_commands()
+                    if apply_config_commands(net_connect, removal_commands):
+                        log.info("%s: PSN05 removed successfully", device_ip)
+                        device_result['psn05_removed'] = True
+                        record_result(results, results_lock, 'psn05_removed', device_ip)
+                        
+                        # Save after removal
+                        save_config(net_connect)
+                    else:
+                        log.error("%s: Failed to remove PSN05", device_ip)
+                else:
+                    log.info("%s: PSN05 not present on device", device_ip)
+            else:
+                log.warning("%s: Authentication tests FAILED - PSN05 will NOT be removed", device_ip)
+                with results_lock:
+                    results['auth_test_failed'].append(device_ip)
+                    results['psn05_kept'].append(device_ip)
+                device_result['psn05_removed'] = False
+                
+        else:
+            log.error("%s: Failed to add PSN01/PSN06 configurations", device_ip)
+            device_result['error'] = "Failed to add PSN configurations"
+            record_result(results, results_lock, 'failed', device_ip)
+        
+        _ssh_pool.release(device_ip, net_connect)
+        
+    except Exception as e:
+        error_msg = str(e)
+        log.error("Failed to process %s: %s", device_ip, error_msg)
+        if net_connect is not None:
+            _ssh_pool.release(device_ip, net_connect, healthy=False)
+        device_result['error'] = error_msg
+        record_result(results, results_lock, 'failed', device_ip)
+    
+    with results_lock:
+        results['details'][device_ip] = device_result
+    return device_ip, device_result
+
+def load_audit_data(audit_file):
+    """Load the audit results JSON, parsing a memory map with orjson when it is installed"""
+    if ORJSON_AVAILABLE and os.path.getsize(audit_file):
+        with open(audit_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # orjson needs a buffer object; release the view before the map closes
+            with memoryview(mm) as buf:
+                return orjson.loads(buf)
+    with open(audit_file, 'r') as f:
+        return json.load(f)
+
+def needs_migration(result):
+    """Device connected during the audit and lacks PSN06 or failed its PSN06 auth test"""
+    if result.get('connection_status') != 'success':
+        return False
+    auth_tests = result.get('auth_tests') or {}
+    return auth_tests.get('PSN06', {}).get('auth_test') != 'pass' or not result.get('psn06_present')
 
 def main():
     print("=== PSN Migration Tool with Authentication Testing ===")
@@ -354,20 +703,10 @@ def main():
         return
     
     # Load audit results
-    with open(audit_file, 'r') as f:
-        audit_data = json.load(f)
+    audit_data = load_audit_data(audit_file)
     
     # Get devices that need migration (have missing configs or auth failures)
-    devices_to_migrate = []
-    for device_ip, result in audit_data.items():
-        if result.get('connection_status') == 'success':
-            # Check if device needs PSN06 or has auth issues
-            auth_tests = result.get('auth_tests', {})
-            psn06_auth = auth_tests.get('PSN06', {}).get('auth_test', 'fail')
-            if psn06_auth != 'pass' or not result.get('psn06_present', False):
-                devices_to_migrate.append(device_ip)
-    
-    devices = devices_to_migrate
+    devices = [device_ip for device_ip, result in audit_data.items() if needs_migration(result)]
     print(f"\nFound {len(devices)} devices that need migration from audit results")
     
     # PSN commands will be determined per device based on supported format
@@ -386,116 +725,52 @@ def main():
     
     print(f"\n=== Processing {len(devices)} Devices ===\n")
     
-    for device_ip in devices:
-        print(f"Processing {device_ip}...")
-        device_result = {
-            'psn_added': False,
-            'auth_test': None,
-            'psn05_removed': False,
-            'error': None
-        }
-        
-        device = {
-            'device_type': 'cisco_ios',
-            'ip': device_ip,
-            'username': username,
-            'password': password,
-            'global_delay_factor': 2,
-            'timeout': 30
-        }
+    # Per-device results are appended here as each device finishes
+    ndjson_file = os.path.join(results_dir, "migration_results.ndjson")
+    
+    # Each device gets its own Netmiko session in a worker thread
+    results_lock = threading.Lock()
+    max_workers = max(1, min(MAX_WORKERS, len(devices)))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                process_device,
+                device_ip,
+                username,
+                password,
+                server_name,
+                server_ip,
+                tacacs_key,
+                radius_key,
+                test_username,
+                test_password,
+                results,
+                results_lock
+            )
+            for device_ip in devices
+        ]
         
-        try:
-            # Connect
-            net_connect = ConnectHandler(**device)
-            print(f"  Connected to {device_ip}")
-            
-            # Check prompt
-            prompt = net_connect.find_prompt()
-            if '#' not in prompt:
-                print(f"  ERROR: Not in enable mode. Prompt: {prompt}")
-                device_result['error'] = "Not in enable mode"
-                results['failed'].append(device_ip)
-                net_connect.disconnect()
-                continue
-            
-            # Step 1: Detect format and get appropriate PSN commands
-            print("  Step 1: Detecting device format and adding PSN configurations...")
-            tacacs_format = detect_tacacs_format(net_connect)
-            print(f"    Detected TACACS format: {tacacs_format}")
-            
-            if tacacs_format == "modern":
-                psn_commands = get_psn_commands_modern(server_name, server_ip, tacacs_key, radius_key)
-            else:
-                psn_commands = get_psn_commands_legacy(server_name, server_ip, tacacs_key, radius_key)
-            
-            if apply_config_commands(net_connect, psn_commands):
-                print(f"  ✓ PSN server {server_name} configured using {tacacs_format} format")
-                device_result['psn_added'] = True
-                results['psn_added'].append(device_ip)
-                
-                # Step 2: Save config before testing
-                print("  Step 2: Saving configuration...")
-                net_connect.send_command("write memory")
-                time.sleep(2)
-                
-                # Step 3: Test authentication
-                print("  Step 3: Testing authentication...")
-                tacacs_ok, tacacs_details = test_tacacs_authentication(net_connect, device_ip, test_username, test_password)
-                radius_ok, radius_details = test_radius_authentication(net_connect, device_ip)
-                
-                auth_passed = tacacs_ok and radius_ok
-                device_result['auth_test'] = {
-                    'passed': auth_passed,
-                    'tacacs': {'result': tacacs_ok, 'details': tacacs_details},
-                    'radius': {'result': radius_ok, 'details': radius_details}
-                }
-                
-                if auth_passed:
-                    print("  ✓ Authentication tests PASSED")
-                    results['auth_test_passed'].append(device_ip)
-                    
-                    # Step 4: Check and remove PSN05 only if tests passed
-                    if check_psn05_present(net_connect):
-                        print("  Step 4: Removing PSN05 (auth tests passed)...")
-                        removal_commands = get_psn05_removal_commands()
-                        if apply_config_commands(net_connect, removal_commands):
-                            print("  ✓ PSN05 removed successfully")
-                            device_result['psn05_removed'] = True
-                            results['psn05_removed'].append(device_ip)
-                            
-                            # Save after removal
-                            net_connect.send_command("write memory")
-                        else:
-                            print("  ✗ Failed to remove PSN05")
-                    else:
-                        print("  ℹ PSN05 not present on device")
-                else:
-                    print("  ✗ Authentication tests FAILED - PSN05 will NOT be removed")
-                    results['auth_test_failed'].append(device_ip)
-                    results['psn05_kept'].append(device_ip)
-                    device_result['psn05_removed'] = False
-                    
+        completed = 0
+        for future in as_completed(futures):
+            device_ip, device_result = future.result()
+            append_device_record(ndjson_file, device_ip, device_result)
+            completed += 1
+            if device_result['error']:
+                status = f"✗ ERROR: {device_result['error']}"
+            elif device_result['auth_test'] and device_result['auth_test']['passed']:
+                status = "✓ Auth PASSED" + (", PSN05 removed" if device_result['psn05_removed'] else "")
             else:
-                print("  ✗ Failed to add PSN01/PSN06 configurations")
-                device_result['error'] = "Failed to add PSN configurations"
-                results['failed'].append(device_ip)
-            
-            net_connect.disconnect()
-            
-        except Exception as e:
-            error_msg = str(e)
-            print(f"  ✗ ERROR: {error_msg}")
-            logging.error(f"Failed to process {device_ip}: {error_msg}")
-            device_result['error'] = error_msg
-            results['failed'].append(device_ip)
-        
-        results['details'][device_ip] = device_result
-        print()  # Blank line between devices
+                status = "✗ Auth FAILED - PSN05 kept"
+            print(f"[{completed}/{len(devices)}] {device_ip}: {status}")
+    
+    # Shutdown phase: close every pooled session
+    _ssh_pool.close_all()
     
     # Save detailed results
     results_file = os.path.join(results_dir, "migration_results.json")
-    with open(results_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    with open(results_file, 'wb') as f:
+        f.write(dumps_json(results, indent=True))
     
     # Create summary report
     summary_file = os.path.join(results_dir, "migration_summary.txt")
@@ -539,6 +814,7 @@ def main():
     
     print(f"\n=== OUTPUT FILES ===")
     print(f"Results: {results_file}")
+    print(f"Per-device log: {ndjson_file}")
     print(f"Summary: {summary_file}")
     print(f"Log: {log_filename}")
 
@@ -1,60 +1,131 @@
 #!/usr/bin/env python3
 
-import PyPDF2
 import os
 import sys
 import glob
+import shutil
+import subprocess
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def convert_pdf_to_text(pdf_path, output_dir="converted_texts"):
+# Parallel conversions; gains flatten out beyond about four processes
+MAX_WORKERS = 4
+
+# PyMuPDF extracts text in native code; PyPDF2 is the pure-Python fallback.
+# Imported on first use so runs served entirely by pdftotext never load either.
+@lru_cache(maxsize=None)
+def pdf_library():
+    """Return the fitz module, or PyPDF2 when PyMuPDF is not installed"""
+    try:
+        import fitz
+        return fitz
+    except ImportError:
+        import PyPDF2
+        return PyPDF2
+
+# Poppler's pdftotext, when installed, is much faster than either Python library
+PDFTOTEXT = shutil.which("pdftotext")
+
+def pdftotext_pages(pdf_path):
+    """Extract all pages with pdftotext; pages come back separated by form feeds"""
+    result = subprocess.run([PDFTOTEXT, "-q", "-enc", "UTF-8", pdf_path, "-"],
+                            capture_output=True, check=True)
+    pages = result.stdout.decode('utf-8', errors='replace').split('\f')
+    if pages and not pages[-1].strip():
+        pages.pop()  # pdftotext ends the last page with a form feed too
+    return pages
+
+def extract_pages(pdf_path):
+    """Yield the text of each page in order"""
+    if PDFTOTEXT:
+        try:
+            pages = pdftotext_pages(pdf_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"   pdftotext failed ({e}), falling back to Python extraction")
+        else:
+            print(f"   Extracted {len(pages)} pages with pdftotext")
+            yield from pages
+            return
+    
+    library = pdf_library()
+    if library.__name__ == 'fitz':
+        # PyMuPDF is not thread-safe; the parallelism comes from converting PDFs in separate processes
+        with library.open(pdf_path) as doc:
+            print(f"   Processing {len(doc)} pages...")
+            for page_num, page in enumerate(doc, 1):
+                try:
+                    yield page.get_text("text")
+                except Exception as e:
+                    yield f"[Error extracting page {page_num}: {e}]"
+        return
+    
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = library.PdfReader(file)
+        num_pages = len(pdf_reader.pages)  # can walk the page tree, so count once
+        print(f"   Processing {num_pages} pages...")
+        for page_num, page in enumerate(iter(pdf_reader.pages), 1):
+            if page_num % 10 == 0:  # Progress indicator every 10 pages
+                print(f"   Page {page_num}/{num_pages}...")
+            try:
+                yield page.extract_text()
+            except Exception as e:
+                yield f"[Error extracting page {page_num}: {e}]"
+
+def output_path_for(pdf_path, output_dir, source_root=None):
+    """Text file for a PDF; under source_root the PDF's sub-folders are mirrored in output_dir"""
+    if source_root:
+        relative = os.path.relpath(pdf_path, source_root)
+    else:
+        relative = os.path.basename(pdf_path)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".txt")
+
+def convert_pdf_to_text(pdf_path, output_dir="converted_texts", source_root=None):
     """Convert a single PDF to text"""
     try:
-        # Create output directory if it doesn't exist
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        output_path = output_path_for(pdf_path, output_dir, source_root)
         
-        # Get the base filename without extension
-        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        output_path = os.path.join(output_dir, f"{base_name}.txt")
+        # Several worker processes may create the same folder at once
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         print(f"\n📄 Converting: {os.path.basename(pdf_path)}")
         
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            
-            print(f"   Processing {len(pdf_reader.pages)} pages...")
-            
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                if page_num % 10 == 0:  # Progress indicator every 10 pages
-                    print(f"   Page {page_num}/{len(pdf_reader.pages)}...")
-                
-                text += f"\n--- Page {page_num} ---\n"
-                try:
-                    text += page.extract_text()
-                except Exception as e:
-                    text += f"[Error extracting page {page_num}: {e}]"
-                text += "\n"
-            
-            with open(output_path, 'w', encoding='utf-8') as output_file:
-                output_file.write(text)
-            
-            print(f"   ✅ Saved to: {output_path}")
-            return True
+        # Write each page straight to a temporary file as it is extracted, and only
+        # move it into place once the whole PDF has been read
+        partial_path = output_path + ".part"
+        try:
+            with open(partial_path, 'w', encoding='utf-8') as output_file:
+                for page_num, page_text in enumerate(extract_pages(pdf_path), 1):
+                    output_file.write(f"\n--- Page {page_num} ---\n")
+                    output_file.write(page_text or "")
+                    output_file.write("\n")
+            os.replace(partial_path, output_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        
+        print(f"   ✅ Saved to: {output_path}")
+        return True
             
     except Exception as e:
         print(f"   ❌ Error converting {pdf_path}: {e}")
         return False
 
+def iter_pdfs(root):
+    """Yield every PDF path under root, using the cached DirEntry type info"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_pdfs(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith('.pdf'):
+                yield entry.path
+
 def main():
     # Base directory
     base_dir = "/Users/keithperez/Documents/Claud/Network tool 1.0"
     
     # Find all PDF files
-    pdf_files = []
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.lower().endswith('.pdf'):
-                pdf_files.append(os.path.join(root, file))
+    pdf_files = list(iter_pdfs(base_dir))
     
     print(f"🔍 Found {len(pdf_files)} PDF files to convert:")
     for pdf in pdf_files:
@@ -66,6 +137,7 @@ def main():
     
     # Create output directory
     output_dir = os.path.join(base_dir, "converted_texts")
+    os.makedirs(output_dir, exist_ok=True)
     
     print(f"\n🚀 Starting batch conversion...")
     print(f"📁 Output directory: {output_dir}")
@@ -73,11 +145,27 @@ def main():
     successful = 0
     failed = 0
     
+    # Two PDFs must never write the same text file from different processes; names that
+    # differ only in case or extension case still collide on some filesystems
+    targets = {}
     for pdf_path in pdf_files:
-        if convert_pdf_to_text(pdf_path, output_dir):
-            successful += 1
-        else:
+        key = os.path.normcase(output_path_for(pdf_path, output_dir, base_dir)).lower()
+        if key in targets:
+            print(f"   ⚠️ Skipping {pdf_path}: same output file as {targets[key]}")
             failed += 1
+        else:
+            targets[key] = pdf_path
+    
+    # Each PDF is independent CPU-bound work, so convert them in separate processes
+    max_workers = max(1, min(MAX_WORKERS, os.cpu_count() or 1, len(targets)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(convert_pdf_to_text, pdf_path, output_dir, base_dir): pdf_path
+                   for pdf_path in targets.values()}
+        for future in as_completed(futures):
+            if future.result():
+                successful += 1
+            else:
+                failed += 1
     
     print(f"\n📊 Conversion Summary:")
     print(f"   ✅ Successful: {successful}")
@@ -1,29 +1,78 @@
 #!/usr/bin/env python3
 
-import PyPDF2
 import sys
 import os
+import shutil
+import subprocess
+from functools import lru_cache
+
+# PyMuPDF extracts text in native code; PyPDF2 is the pure-Python fallback.
+# Imported on first use so runs served entirely by pdftotext never load either.
+@lru_cache(maxsize=None)
+def pdf_library():
+    """Return the fitz module, or PyPDF2 when PyMuPDF is not installed"""
+    try:
+        import fitz
+        return fitz
+    except ImportError:
+        import PyPDF2
+        return PyPDF2
+
+# Poppler's pdftotext, when installed, is much faster than either Python library
+PDFTOTEXT = shutil.which("pdftotext")
+
+def pdftotext_pages(pdf_path):
+    """Extract all pages with pdftotext; pages come back separated by form feeds"""
+    result = subprocess.run([PDFTOTEXT, "-q", "-enc", "UTF-8", pdf_path, "-"],
+                            capture_output=True, check=True)
+    pages = result.stdout.decode('utf-8', errors='replace').split('\f')
+    if pages and not pages[-1].strip():
+        pages.pop()  # pdftotext ends the last page with a form feed too
+    return pages
+
+def iter_page_text(pdf_path):
+    """Yield the text of each page in order"""
+    if PDFTOTEXT:
+        try:
+            pages = pdftotext_pages(pdf_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"pdftotext failed ({e}), falling back to Python extraction")
+        else:
+            print(f"Extracted {len(pages)} pages with pdftotext")
+            yield from pages
+            return
+    
+    library = pdf_library()
+    if library.__name__ == 'fitz':
+        with library.open(pdf_path) as doc:
+            print(f"Processing {len(doc)} pages...")
+            for page in doc:
+                yield page.get_text("text")
+        return
+    
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = library.PdfReader(file)
+        num_pages = len(pdf_reader.pages)  # can walk the page tree, so count once
+        print(f"Processing {num_pages} pages...")
+        for page_num, page in enumerate(iter(pdf_reader.pages), 1):
+            print(f"Extracting page {page_num}...")
+            yield page.extract_text()
 
 def pdf_to_text(pdf_path, output_path=None):
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            
-            print(f"Processing {len(pdf_reader.pages)} pages...")
-            
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                print(f"Extracting page {page_num}...")
-                text += f"\n--- Page {page_num} ---\n"
-                text += page.extract_text()
-                text += "\n"
-            
+        # Stream pages to the file (or stdout) as they are extracted
+        output_file = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+        try:
+            for page_num, page_text in enumerate(iter_page_text(pdf_path), 1):
+                output_file.write(f"\n--- Page {page_num} ---\n")
+                output_file.write(page_text or "")
+                output_file.write("\n")
+        finally:
             if output_path:
-                with open(output_path, 'w', encoding='utf-8') as output_file:
-                    output_file.write(text)
-                print(f"Text saved to: {output_path}")
-            else:
-                print(text)
+                output_file.close()
+        
+        if output_path:
+            print(f"Text saved to: {output_path}")
                 
     except Exception as e:
         print(f"Error: {e}")
@@ -19,6 +19,47 @@
 # @requires: snmp
 # @parameters: [{"name": "device_ip", "type": "string", "required": true, "description": "Device IP address"}]
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Below this many interfaces the plain loop is cheaper than building arrays
+NUMPY_MIN_INTERFACES = 32
+
+def compute_utilization(interfaces):
+    """Return (in_utilization, out_utilization) lists in percent, rounded to 2 places"""
+    if NUMPY_AVAILABLE and len(interfaces) >= NUMPY_MIN_INTERFACES:
+        count = len(interfaces)
+        in_bytes = np.fromiter((i.get('inOctets', 0) for i in interfaces), dtype=np.float64, count=count)
+        out_bytes = np.fromiter((i.get('outOctets', 0) for i in interfaces), dtype=np.float64, count=count)
+        speed = np.fromiter((i.get('speed', 0) for i in interfaces), dtype=np.float64, count=count)
+        
+        # Divide only where speed > 0; other interfaces stay at 0
+        valid = speed > 0
+        in_util = np.zeros(count)
+        out_util = np.zeros(count)
+        np.divide(in_bytes * 800.0, speed, out=in_util, where=valid)
+        np.divide(out_bytes * 800.0, speed, out=out_util, where=valid)
+        return in_util.round(2).tolist(), out_util.round(2).tolist()
+    
+    in_util = []
+    out_util = []
+    for intf in interfaces:
+        in_bytes = intf.get('inOctets', 0)
+        out_bytes = intf.get('outOctets', 0)
+        speed = intf.get('speed', 0)
+        
+        # Calculate utilization
+        if speed > 0:
+            in_util.append(round((in_bytes * 8 / speed) * 100, 2))
+            out_util.append(round((out_bytes * 8 / speed) * 100, 2))
+        else:
+            in_util.append(0.0)
+            out_util.append(0.0)
+    return in_util, out_util
+
 def generate_utilization_report(device_ip):
     log_message(f"Generating interface utilization report for {device_ip}")
     
@@ -35,28 +76,19 @@ def generate_utilization_report(device_ip):
         'interfaces': []
     }
     
-    for intf in interfaces:
+    in_utilization, out_utilization = compute_utilization(interfaces)
+    
+    for intf, in_util, out_util in zip(interfaces, in_utilization, out_utilization):
         name = intf.get('name', 'Unknown')
-        in_bytes = intf.get('inOctets', 0)
-        out_bytes = intf.get('outOctets', 0)
-        speed = intf.get('speed', 0)
-        
-        # Calculate utilization
-        if speed > 0:
-            in_utilization = (in_bytes * 8 / speed) * 100
-            out_utilization = (out_bytes * 8 / speed) * 100
-        else:
-            in_utilization = 0
-            out_utilization = 0
         
         report['interfaces'].append({
             'name': name,
-            'in_utilization': round(in_utilization, 2),
-            'out_utilization': round(out_utilization, 2),
+            'in_utilization': in_util,
+            'out_utilization': out_util,
             'status': intf.get('operStatus', 'unknown')
         })
         
-        log_message(f"Interface {name}: In={in_utilization:.1f}%, Out={out_utilization:.1f}%")
+        log_message(f"Interface {name}: In={in_util:.1f}%, Out={out_util:.1f}%")
     
     save_result(f'utilization_report_{device_ip}', report)
     return report
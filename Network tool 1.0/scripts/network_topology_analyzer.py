@@ -20,6 +20,8 @@
 # @parameters: []
 
 import json
+from collections import Counter
+from itertools import chain
 
 def analyze_topology():
     topology = get_network_topology()
@@ -31,16 +33,12 @@ def analyze_topology():
     log_message(f"Topology contains {len(nodes)} nodes and {len(links)} links")
     
     # Find nodes with most connections (potential bottlenecks)
-    node_connections = {}
-    for link in links:
-        source = link.get('source')
-        target = link.get('target')
-        
-        node_connections[source] = node_connections.get(source, 0) + 1
-        node_connections[target] = node_connections.get(target, 0) + 1
+    node_connections = Counter(chain.from_iterable(
+        (link.get('source'), link.get('target')) for link in links
+    ))
     
-    # Sort by connection count
-    critical_nodes = sorted(node_connections.items(), key=lambda x: x[1], reverse=True)[:5]
+    # Top 5 by connection count; most_common(k) is a heapq.nlargest top-k, not a full sort
+    critical_nodes = node_connections.most_common(5)
     
     analysis = {
         'total_nodes': len(nodes),
@@ -1,13 +1,28 @@
 from getpass import getpass
-from netmiko import ConnectHandler
-import tkinter as tk
-from tkinter import filedialog
+import argparse
 import re
 import logging
 import os
 import json
 import csv
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Maximum number of devices audited concurrently
+MAX_WORKERS = 20
+
+# Write buffer for the CSV summary
+CSV_BUFFER_SIZE = 1 << 20
+
+# One run timestamp shared by the log file, audit folder and output files
+RUN_TS = datetime.now().strftime("%Y%m%d_%H%M%S")
 
 # === Section 1: Setup Logging ===
 def setup_logging():
@@ -20,8 +35,7 @@ def setup_logging():
     if not os.path.exists(logs_dir):
         os.makedirs(logs_dir)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_filename = os.path.join(logs_dir, f"cisco_audit_log_{timestamp}.log")
+    log_filename = os.path.join(logs_dir, f"cisco_audit_log_{RUN_TS}.log")
     
     logging.basicConfig(
         level=logging.INFO,
@@ -45,8 +59,7 @@ def create_audit_dir():
         os.makedirs(audit_base_dir)
     
     # Create timestamped audit folder within audits directory
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    audit_dir = os.path.join(audit_base_dir, f"audit_{timestamp}")
+    audit_dir = os.path.join(audit_base_dir, f"audit_{RUN_TS}")
     if not os.path.exists(audit_dir):
         os.makedirs(audit_dir)
     
@@ -55,6 +68,8 @@ def create_audit_dir():
 # === Section 3: Enhanced Connection Function ===
 def connect_to_device(device_info, timeout=30):
     """Connect to device with enhanced error handling"""
+    # Imported here so --help and argument errors don't pay for loading Netmiko
+    from netmiko import ConnectHandler
     try:
         net_connect = ConnectHandler(**device_info, timeout=timeout)
         logging.info(f"Successfully connected to {device_info['ip']}")
@@ -64,34 +79,43 @@ def connect_to_device(device_info, timeout=30):
         raise
 
 # === Section 4: Save Audit Results ===
+def write_json(path, data):
+    """Write indented JSON in one call, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(payload)
+
 def save_audit_results(audit_results, audit_dir):
     """Save audit results in multiple formats"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = RUN_TS
     
     # Save as JSON (detailed format)
     json_file = os.path.join(audit_dir, f"audit_results_{timestamp}.json")
-    with open(json_file, 'w') as f:
-        json.dump(audit_results, f, indent=2)
+    write_json(json_file, audit_results)
     
     # Save as CSV (summary format)
     csv_file = os.path.join(audit_dir, f"audit_summary_{timestamp}.csv")
-    with open(csv_file, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Device IP', 'Connection Status', 'TACACS+ Server Group', 'RADIUS Server Group', 'TACACS Server Definition', 'Missing Configs Count'])
-        
-        for device_ip, result in audit_results.items():
-            if result['connection_status'] == 'success':
-                missing_count = len(result['missing_configs'])
-                writer.writerow([
-                    device_ip,
-                    result['connection_status'],
-                    'FOUND' if 'TACACS+ Server Group PSN06' in result['found_configs'] else 'MISSING',
-                    'FOUND' if 'RADIUS Server Group PSN06-R' in result['found_configs'] else 'MISSING',
-                    'FOUND' if 'TACACS Server Definition PSN06' in result['found_configs'] else 'MISSING',
-                    missing_count
-                ])
-            else:
-                writer.writerow([device_ip, result['connection_status'], 'N/A', 'N/A', 'N/A', 'N/A'])
+    rows = [['Device IP', 'Connection Status', 'TACACS+ Server Group', 'RADIUS Server Group', 'TACACS Server Definition', 'Missing Configs Count']]
+    for device_ip, result in audit_results.items():
+        if result['connection_status'] == 'success':
+            found = set(result['found_configs'])
+            rows.append([
+                device_ip,
+                result['connection_status'],
+                'FOUND' if 'TACACS+ Server Group PSN06' in found else 'MISSING',
+                'FOUND' if 'RADIUS Server Group PSN06-R' in found else 'MISSING',
+                'FOUND' if 'TACACS Server Definition PSN06' in found else 'MISSING',
+                len(result['missing_configs'])
+            ])
+        else:
+            rows.append([device_ip, result['connection_status'], 'N/A', 'N/A', 'N/A', 'N/A'])
+    
+    # Large buffer so the whole summary goes out in a few writes
+    with open(csv_file, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+        csv.writer(f).writerows(rows)
     
     # Save remediation file (for Part 2 tool)
     remediation_file = os.path.join(audit_dir, f"remediation_data_{timestamp}.json")
@@ -100,12 +124,12 @@ def save_audit_results(audit_results, audit_dir):
     for device_ip, result in audit_results.items():
         if result['connection_status'] == 'success' and result['missing_configs']:
             remediation_data[device_ip] = {
+                'device_type': result['device_type'],
                 'missing_configs': result['missing_configs'],
                 'remediation_commands': result['remediation_commands']
             }
     
-    with open(remediation_file, 'w') as f:
-        json.dump(remediation_data, f, indent=2)
+    write_json(remediation_file, remediation_data)
     
     logging.info(f"Audit results saved to: {json_file}")
     logging.info(f"Audit summary saved to: {csv_file}")
@@ -113,8 +137,163 @@ def save_audit_results(audit_results, audit_dir):
     
     return json_file, csv_file, remediation_file
 
-# === Section 5: Main Audit Function ===
+# === Section 5: Config Block Matching ===
+def normalize_line(line):
+    """Lower-case a config line and collapse its whitespace"""
+    return ' '.join(line.split()).lower()
+
+def find_configs(running_config, config_checks):
+    """
+    Return the names of the checks whose block contains their required line
+    Single pass: a top-level line opens a block, indented lines belong to it
+    """
+    wanted = {}
+    for check in config_checks:
+        wanted.setdefault(normalize_line(check['block']), []).append(
+            (normalize_line(check['line']), check['name'])
+        )
+    
+    found = set()
+    current = None
+    for line in running_config.splitlines():
+        if not line.strip():
+            continue
+        if not line[0].isspace():
+            # New top-level command (or "!") ends the previous block
+            current = wanted.get(normalize_line(line))
+            continue
+        if current:
+            child = normalize_line(line)
+            for required, name in current:
+                if child == required:
+                    found.add(name)
+    return found
+
+def dedupe_remediation(commands):
+    """
+    Drop repeated remediation lines while keeping the original order
+    Indented lines are keyed by the block they belong to, so a line is only a
+    duplicate if the same block already set it. A repeated block header is kept
+    (with its "exit") when the block still adds new lines, and dropped along
+    with its "exit" when everything in it was already sent
+    """
+    # Split into groups: a top-level line, its indented lines, and its "exit" if any
+    groups = []
+    for cmd in commands:
+        if cmd[:1].isspace() and groups and not groups[-1][2]:
+            groups[-1][1].append(cmd)
+        elif cmd == "exit" and groups and not groups[-1][2]:
+            groups[-1][2] = cmd
+        else:
+            groups.append([cmd, [], None])
+    
+    seen = set()
+    result = []
+    for header, children, exit_cmd in groups:
+        new_children = [child for child in children if (header, child) not in seen]
+        if header in seen and not new_children:
+            continue
+        seen.add(header)
+        seen.update((header, child) for child in new_children)
+        result.append(header)
+        result.extend(new_children)
+        if exit_cmd:
+            result.append(exit_cmd)
+    return result
+
+# === Section 6: Audit a Single Device ===
+def audit_device(device_ip, username, password, config_checks):
+    """Audit one device against the config checks; returns (device_ip, device_audit)"""
+    logging.info(f"Starting audit for device: {device_ip}")
+    audit_timestamp = datetime.now().isoformat()
+    
+    device = {
+        'device_type': 'cisco_ios',
+        'ip': device_ip,
+        'username': username,
+        'password': password,
+    }
+    
+    try:
+        net_connect = connect_to_device(device)
+        
+        try:
+            # Get running configuration, waiting on the known prompt rather than re-detecting it
+            prompt = net_connect.find_prompt()
+            running_config = net_connect.send_command(
+                "show running-config",
+                expect_string=re.escape(prompt),
+                read_timeout=60,
+                strip_prompt=True,
+                strip_command=True
+            )
+        finally:
+            net_connect.disconnect()
+            logging.info(f"Disconnected from {device_ip}")
+        
+        # Initialize device audit results
+        device_audit = {
+            'connection_status': 'success',
+            'audit_timestamp': audit_timestamp,
+            'device_type': device['device_type'],
+            'found_configs': [],
+            'missing_configs': [],
+            'remediation_commands': []
+        }
+        
+        # Check all configurations in one pass over the running config
+        found = find_configs(running_config, config_checks)
+        for check in config_checks:
+            if check['name'] in found:
+                logging.info(f"Configuration found on {device_ip}: {check['name']}")
+                device_audit['found_configs'].append(check['name'])
+            else:
+                logging.warning(f"Configuration missing on {device_ip}: {check['name']}")
+                device_audit['missing_configs'].append(check['name'])
+                device_audit['remediation_commands'].extend(check['remediation'])
+        
+        device_audit['remediation_commands'] = dedupe_remediation(device_audit['remediation_commands'])
+        return device_ip, device_audit
+        
+    except Exception as e:
+        logging.error(f"Failed to process {device_ip}: {e}")
+        
+        # Store failed connection in audit results
+        return device_ip, {
+            'connection_status': 'failed',
+            'audit_timestamp': audit_timestamp,
+            'error': str(e),
+            'found_configs': [],
+            'missing_configs': [],
+            'remediation_commands': []
+        }
+
+# === Section 7: Command-Line Arguments ===
+def parse_args():
+    """Parse command-line options; anything not given is prompted for"""
+    parser = argparse.ArgumentParser(description="PSN06 Config Audit Tool (Audit Only)")
+    parser.add_argument("--device-list", help="Text file with one IP or hostname per line")
+    parser.add_argument("--user", help="SSH username")
+    parser.add_argument("--gui", action="store_true",
+                        help="Pick the device list with a file dialog instead of typing the path")
+    return parser.parse_args()
+
+def pick_file(title, filetypes):
+    """Show a file dialog and tear Tk down again before the audit starts"""
+    # Imported here so headless runs never load tkinter
+    import tkinter as tk
+    from tkinter import filedialog
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        return filedialog.askopenfilename(title=title, filetypes=filetypes)
+    finally:
+        root.destroy()
+
+# === Section 8: Main Audit Function ===
 def main():
+    args = parse_args()
+    
     # Setup logging
     log_filename = setup_logging()
     logging.info("=== PSN06 Config Audit Tool Started (Audit Only) ===")
@@ -125,17 +304,17 @@ def main():
     
     # Prompt for SSH Credentials
     print("=== PSN06 Config Audit Tool (Audit Only) ===")
-    username = input("Enter your SSH username: ")
+    username = args.user or input("Enter your SSH username: ")
     password = getpass("Enter your SSH password: ")
     
-    # File Explorer to Select Device List
-    print("\nPlease select the device list text file (one IP or hostname per line).")
-    root = tk.Tk()
-    root.withdraw()
-    device_file_path = filedialog.askopenfilename(
-        title="Select Device List File", 
-        filetypes=[("Text Files", "*.txt")]
-    )
+    # Device list from the command line, a file dialog (--gui) or a typed path
+    if args.device_list:
+        device_file_path = args.device_list
+    elif args.gui:
+        print("\nPlease select the device list text file (one IP or hostname per line).")
+        device_file_path = pick_file("Select Device List File", [("Text Files", "*.txt")])
+    else:
+        device_file_path = input("\nEnter the device list text file (one IP or hostname per line): ").strip()
     
     if not device_file_path:
         logging.error("No device file selected. Exiting.")
@@ -143,8 +322,8 @@ def main():
     
     # Load Device IPs
     try:
-        with open(device_file_path, 'r') as file:
-            device_list = [line.strip() for line in file if line.strip()]
+        # split() drops blank lines and surrounding whitespace in one pass
+        device_list = Path(device_file_path).read_text().split()
         logging.info(f"Loaded {len(device_list)} devices from {device_file_path}")
     except Exception as e:
         logging.error(f"Failed to read device file: {e}")
@@ -154,7 +333,8 @@ def main():
     config_checks = [
         {
             "name": "TACACS+ Server Group PSN06",
-            "match": r"aaa group server tacacs\+\s+ISE-TACACS[\s\S]*?server name PVA-M-ISE-PSN06",
+            "block": "aaa group server tacacs+ ISE-TACACS",
+            "line": "server name PVA-M-ISE-PSN06",
             "remediation": [
                 "aaa group server tacacs+ ISE-TACACS",
                 " server name PVA-M-ISE-PSN06",
@@ -163,7 +343,8 @@ def main():
         },
         {
             "name": "RADIUS Server Group PSN06-R",
-            "match": r"aaa group server radius\s+ISE-RADIUS[\s\S]*?server name PVA-M-ISE-PSN06-R",
+            "block": "aaa group server radius ISE-RADIUS",
+            "line": "server name PVA-M-ISE-PSN06-R",
             "remediation": [
                 "aaa group server radius ISE-RADIUS",
                 " server name PVA-M-ISE-PSN06-R",
@@ -172,7 +353,8 @@ def main():
         },
         {
             "name": "TACACS Server Definition PSN06",
-            "match": r"tacacs server PVA-M-ISE-PSN06\s+address ipv4 172\.18\.31\.101",
+            "block": "tacacs server PVA-M-ISE-PSN06",
+            "line": "address ipv4 172.18.31.101",
             "remediation": [
                 "tacacs server PVA-M-ISE-PSN06",
                 " address ipv4 172.18.31.101",
@@ -191,74 +373,35 @@ def main():
     failed_connections = 0
     devices_needing_config = 0
     
-    # Connect to Devices and Audit
-    for device_ip in device_list:
-        print(f"\n=== Auditing Device: {device_ip} ===")
-        logging.info(f"Starting audit for device: {device_ip}")
-        
-        device = {
-            'device_type': 'cisco_ios',
-            'ip': device_ip,
-            'username': username,
-            'password': password,
-        }
+    # Connect to Devices and Audit (each device in its own worker thread)
+    max_workers = max(1, min(MAX_WORKERS, total_devices))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(audit_device, device_ip, username, password, config_checks)
+            for device_ip in device_list
+        ]
         
-        try:
-            net_connect = connect_to_device(device)
-            successful_connections += 1
-            
-            # Get running configuration
-            running_config = net_connect.send_command("show running-config")
-            
-            # Initialize device audit results
-            device_audit = {
-                'connection_status': 'success',
-                'audit_timestamp': datetime.now().isoformat(),
-                'found_configs': [],
-                'missing_configs': [],
-                'remediation_commands': []
-            }
-            
-            # Check all configurations
-            for check in config_checks:
-                print(f"Checking: {check['name']}... ", end="")
-                if re.search(check['match'], running_config, re.MULTILINE | re.DOTALL | re.IGNORECASE):
-                    print("FOUND")
-                    logging.info(f"Configuration found on {device_ip}: {check['name']}")
-                    device_audit['found_configs'].append(check['name'])
-                else:
-                    print("MISSING")
-                    logging.warning(f"Configuration missing on {device_ip}: {check['name']}")
-                    device_audit['missing_configs'].append(check['name'])
-                    device_audit['remediation_commands'].extend(check['remediation'])
-            
-            # Store audit results
+        completed = 0
+        for future in as_completed(futures):
+            device_ip, device_audit = future.result()
             audit_results[device_ip] = device_audit
+            completed += 1
             
-            if device_audit['missing_configs']:
-                devices_needing_config += 1
-                print(f"Device {device_ip} is missing {len(device_audit['missing_configs'])} configuration(s).")
+            if device_audit['connection_status'] != 'success':
+                failed_connections += 1
+                print(f"[{completed}/{total_devices}] Failed to process {device_ip}: {device_audit['error']}")
             else:
-                print(f"Device {device_ip} has all required configurations.")
-            
-            net_connect.disconnect()
-            logging.info(f"Disconnected from {device_ip}")
-            
-        except Exception as e:
-            failed_connections += 1
-            error_msg = f"Failed to process {device_ip}: {e}"
-            print(error_msg)
-            logging.error(error_msg)
-            
-            # Store failed connection in audit results
-            audit_results[device_ip] = {
-                'connection_status': 'failed',
-                'audit_timestamp': datetime.now().isoformat(),
-                'error': str(e),
-                'found_configs': [],
-                'missing_configs': [],
-                'remediation_commands': []
-            }
+                successful_connections += 1
+                if device_audit['missing_configs']:
+                    devices_needing_config += 1
+                    print(f"[{completed}/{total_devices}] Device {device_ip} is missing "
+                          f"{len(device_audit['missing_configs'])} configuration(s): "
+                          f"{', '.join(device_audit['missing_configs'])}")
+                else:
+                    print(f"[{completed}/{total_devices}] Device {device_ip} has all required configurations.")
+    
+    # Keep results in device-list order for the output files
+    audit_results = {device_ip: audit_results[device_ip] for device_ip in device_list}
     
     # Save audit results
     json_file, csv_file, remediation_file = save_audit_results(audit_results, audit_dir)
@@ -1,87 +1,275 @@
 from getpass import getpass
 from netmiko import ConnectHandler
-import tkinter as tk
-from tkinter import filedialog
+import argparse
+import sys
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
 import json
 import csv
 import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import queue
+import multiprocessing
+import asyncio
+import re
+import hashlib
 
-# === Section 1: Setup Logging ===
-def setup_logging():
-    """Setup logging configuration"""
-    # Get the directory where the script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import asyncssh
+    ASYNCSSH_AVAILABLE = True
+except ImportError:
+    ASYNCSSH_AVAILABLE = False
+
+# Directory the script lives in; logs, results and backups are created under it
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Use the asyncssh/asyncio fan-out instead of Netmiko worker threads.
+# Off by default: Netmiko remains the supported path; enable once asyncssh
+# is installed and validated against the fleet.
+USE_ASYNCSSH = False
+ASYNC_CONCURRENCY = 100
+# Split very large asyncssh pushes across this many processes, one event loop each
+ASYNC_PROCESSES = int(os.environ.get('ASYNC_PROCESSES', '1'))
+
+# Longest wait for a full running-config during backup
+BACKUP_READ_TIMEOUT = 120
+
+# Thread ceiling: SSH workers spend almost all their time waiting on the network,
+# so the cap scales well past the CPU count
+MAX_THREADS = max(32, (os.cpu_count() or 4) * 8)
+
+# Print a one-line progress summary every this many devices; per-device lines go to the log
+PROGRESS_EVERY = 10
+
+# fsync the per-device result files after this many results
+RESULT_FSYNC_EVERY = 10
+
+# Command output kept per device in the results files (0 keeps everything); --max-output-bytes
+MAX_OUTPUT_BYTES = 4096
+
+# Save command and timeout per Netmiko device_type (taken from the audit's remediation file)
+DEFAULT_PLATFORM = 'cisco_ios'
+SAVE_CONFIG = {
+    'cisco_ios': ('write memory', 30),
+    'aruba_aoscx': ('write memory', 60),
+}
+
+# Placeholder the audit tool writes in place of the TACACS+ key
+TACACS_KEY_PLACEHOLDER = '<TACACS_KEY_PLACEHOLDER>'
+
+# Prompt / error markers for the asyncssh interactive shell
+_PROMPT_RE = re.compile(r'[>#]\s*$')
+_PASSWORD_RE = re.compile(r'[Pp]assword:\s*$')
+# Only the device's own rejection lines count; echoed commands (keys, names) may contain any word
+_ERROR_RE = re.compile(r'(?m)^[ \t]*(?:%\s*(?:Invalid|Incomplete|Ambiguous)|Invalid input)')
+
+# SSH connection pool settings (overridable from the environment)
+CONNECTION_POOL_ENABLED = os.environ.get('CONNECTION_POOL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CONNECTION_POOL_MAX_SIZE = int(os.environ.get('CONNECTION_POOL_MAX_SIZE', '50'))
+CONNECTION_POOL_IDLE_TIMEOUT = int(os.environ.get('CONNECTION_POOL_IDLE_TIMEOUT', '300'))
+CONNECTION_POOL_MAX_AGE = int(os.environ.get('CONNECTION_POOL_MAX_AGE', '3600'))
+
+# === Section 1: Prepare Run Directories ===
+def prepare_run_dirs():
+    """Create the log, results and backup folders for this run under one timestamp"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # Create logs folder within script directory
-    logs_dir = os.path.join(script_dir, "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    logs_dir = os.path.join(SCRIPT_DIR, "logs")
+    results_dir = os.path.join(SCRIPT_DIR, "push_results", f"push_results_{timestamp}")
+    backup_dir = os.path.join(SCRIPT_DIR, "backups", f"config_backups_{timestamp}")
+    for path in (logs_dir, results_dir, backup_dir):
+        os.makedirs(path, exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_filename = os.path.join(logs_dir, f"cisco_push_log_{timestamp}.log")
-    
+    return log_filename, results_dir, backup_dir, timestamp
+
+# === Section 2: Setup Logging ===
+def setup_logging(log_filename):
+    """Setup logging configuration"""
+    # Full detail goes to the log file; the console only shows problems, progress is printed
+    file_handler = logging.FileHandler(log_filename)
+    file_handler.setLevel(logging.INFO)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename),
-            logging.StreamHandler()
-        ]
+        handlers=[file_handler, console_handler]
     )
-    return log_filename
 
-# === Section 2: Create Results Directory ===
-def create_results_dir():
-    """Create results directory if it doesn't exist"""
-    # Get the directory where the script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Create results folder within script directory
-    results_base_dir = os.path.join(script_dir, "push_results")
-    if not os.path.exists(results_base_dir):
-        os.makedirs(results_base_dir)
-    
-    # Create timestamped results folder within results directory
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_dir = os.path.join(results_base_dir, f"push_results_{timestamp}")
-    if not os.path.exists(results_dir):
-        os.makedirs(results_dir)
-    
-    return results_dir
+# === Section 3: SSH Connection Pool ===
+class SSHPool:
+    """Thread-safe pool of idle Netmiko sessions keyed by (ip, username, port, device_type)"""
+    
+    def __init__(self, enabled=True, max_size=50, idle_timeout=300, max_age=3600):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self._idle = OrderedDict()   # key -> (net_connect, created, last_used), LRU first
+        self._created = {}           # id(net_connect) -> (key, created) for sessions lent out
+        self._lock = threading.Lock()
+        self._reaper = None
+    
+    @staticmethod
+    def _key(device):
+        return (device['ip'], device['username'], device.get('port', 22), device['device_type'])
+    
+    @staticmethod
+    def _close(net_connect):
+        try:
+            net_connect.disconnect()
+        except Exception:
+            pass
+    
+    def _expired(self, created, last_used, now):
+        return now - last_used > self.idle_timeout or now - created > self.max_age
+    
+    def _start_reaper(self):
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, name="ssh-pool-reaper", daemon=True)
+            self._reaper.start()
+    
+    def _reap_loop(self):
+        interval = max(1, min(self.idle_timeout, self.max_age) // 4)
+        while True:
+            time.sleep(interval)
+            self.reap()
+    
+    def reap(self):
+        """Close idle sessions past the idle timeout or maximum age"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, created, last_used) in self._idle.items()
+                       if self._expired(created, last_used, now)]
+            stale = [self._idle.pop(key)[0] for key in expired]
+        for net_connect in stale:
+            self._close(net_connect)
+    
+    def get(self, device_ip, device):
+        """Return a live pooled session for the device, or open a new one"""
+        key = self._key(device)
+        now = time.monotonic()
+        entry = None
+        if self.enabled:
+            with self._lock:
+                entry = self._idle.pop(key, None)
+        
+        if entry is not None:
+            net_connect, created, last_used = entry
+            if not self._expired(created, last_used, now) and net_connect.is_alive():
+                logging.info(f"Reusing pooled SSH session to {device_ip}")
+                with self._lock:
+                    self._created[id(net_connect)] = (key, created)
+                return net_connect
+            self._close(net_connect)
+        
+        net_connect = ConnectHandler(**device, timeout=30)
+        if self.enabled:
+            with self._lock:
+                self._created[id(net_connect)] = (key, now)
+        return net_connect
+    
+    def release(self, net_connect, healthy=True):
+        """Hand a session back; it is left at the enable prompt for the next caller"""
+        with self._lock:
+            key, created = self._created.pop(id(net_connect), (None, None))
+        if not self.enabled or not healthy or key is None:
+            self._close(net_connect)
+            return
+        
+        try:
+            if net_connect.check_config_mode():
+                net_connect.exit_config_mode()
+        except Exception:
+            self._close(net_connect)
+            return
+        
+        evicted = []
+        with self._lock:
+            if key in self._idle:
+                evicted.append(self._idle.pop(key)[0])
+            self._idle[key] = (net_connect, created, time.monotonic())
+            while len(self._idle) > self.max_size:
+                evicted.append(self._idle.popitem(last=False)[1][0])
+            self._start_reaper()
+        for stale in evicted:
+            self._close(stale)
+    
+    def close_all(self):
+        """Disconnect every idle session"""
+        with self._lock:
+            idle = [entry[0] for entry in self._idle.values()]
+            self._idle.clear()
+        for net_connect in idle:
+            self._close(net_connect)
 
-# === Section 3: Create Backup Directory ===
-def create_backup_dir():
-    """Create backup directory if it doesn't exist"""
-    # Get the directory where the script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Create backups folder within script directory
-    backups_base_dir = os.path.join(script_dir, "backups")
-    if not os.path.exists(backups_base_dir):
-        os.makedirs(backups_base_dir)
-    
-    # Create timestamped backup folder within backups directory
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_dir = os.path.join(backups_base_dir, f"config_backups_{timestamp}")
-    if not os.path.exists(backup_dir):
-        os.makedirs(backup_dir)
-    
-    return backup_dir
+POOL = SSHPool(
+    enabled=CONNECTION_POOL_ENABLED,
+    max_size=CONNECTION_POOL_MAX_SIZE,
+    idle_timeout=CONNECTION_POOL_IDLE_TIMEOUT,
+    max_age=CONNECTION_POOL_MAX_AGE
+)
 
 # === Section 4: Backup Configuration ===
+def stream_command_to_file(net_connect, command, fh, read_timeout=BACKUP_READ_TIMEOUT):
+    """
+    Run a show command and write its output to fh as it arrives
+    The echoed command line and the trailing prompt are dropped, and ANSI escapes,
+    backspaces and carriage returns are cleaned up as send_command would, so the file
+    matches its output without holding it all in memory
+    """
+    prompt = net_connect.find_prompt()
+    hold = len(prompt) + 16      # keep enough back to strip the final prompt
+    pending = ''
+    echo_seen = False
+    deadline = time.monotonic() + read_timeout
+    
+    net_connect.write_channel(command + net_connect.RETURN)
+    while True:
+        chunk = net_connect.read_channel()
+        if not chunk:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for prompt after '{command}'")
+            time.sleep(0.05)
+            continue
+        
+        # Clean the held tail together with the new chunk so an escape split across reads is caught
+        pending = net_connect.strip_ansi_escape_codes(
+            net_connect.strip_backspaces(pending + chunk.replace('\r', '')))
+        if not echo_seen:
+            if '\n' not in pending:
+                continue
+            pending = pending.split('\n', 1)[1]
+            echo_seen = True
+        
+        # Only a prompt alone on the last line ends the output; a config line can end in "<hostname>#"
+        text = pending.rstrip()
+        if text.rsplit('\n', 1)[-1] == prompt:
+            fh.write(text[:-len(prompt)].encode('utf-8'))
+            return
+        if len(pending) > hold:
+            fh.write(pending[:-hold].encode('utf-8'))
+            pending = pending[-hold:]
+
 def backup_config(net_connect, device_ip, backup_dir):
     """Backup device configuration before making changes"""
     try:
-        running_config = net_connect.send_command("show running-config")
         backup_filename = os.path.join(backup_dir, f"{device_ip}_backup.cfg")
         
-        with open(backup_filename, 'w') as backup_file:
-            backup_file.write(running_config)
+        # Stream straight to disk so large configs are never held whole in memory
+        with open(backup_filename, 'wb') as backup_file:
+            stream_command_to_file(net_connect, "show running-config", backup_file)
         
         logging.info(f"Configuration backup created: {backup_filename}")
         return True
@@ -90,7 +278,51 @@ def backup_config(net_connect, device_ip, backup_dir):
         return False
 
 # === Section 5: Apply Configuration Function ===
-def apply_config_to_device(device_ip, username, password, commands, backup_dir, tacacs_key):
+def expand_remediation_commands(remediation_data, tacacs_key):
+    """Replace the TACACS key placeholder and strip every command, in place"""
+    for data in remediation_data.values():
+        data['remediation_commands'] = [
+            cmd.replace(TACACS_KEY_PLACEHOLDER, tacacs_key).strip()
+            for cmd in data['remediation_commands']
+        ]
+
+def cap_output(output, limit=None):
+    """Truncate stored command output, keeping its full length and SHA-256 for auditing"""
+    limit = MAX_OUTPUT_BYTES if limit is None else limit
+    if not limit or len(output) <= limit:
+        return output
+    digest = hashlib.sha256(output.encode('utf-8', 'replace')).hexdigest()
+    return f"{output[:limit]}\n...(truncated, {len(output)} chars total, sha256={digest})"
+
+def save_device_config(net_connect, platform):
+    """Save the running config using the platform's command and timeout"""
+    save_command, save_timeout = SAVE_CONFIG.get(platform, SAVE_CONFIG[DEFAULT_PLATFORM])
+    return net_connect.send_command(save_command, read_timeout=save_timeout)
+
+def send_config_lines(net_connect, commands, transcript, read_timeout=60):
+    """
+    Send config lines one at a time and stop at the first one the device rejects
+    Each line's output is appended to transcript as it arrives, so the output survives
+    a rejection or a timeout. Returns a description of the rejected line, or None
+    """
+    # The same per-line prompt handshake send_config_set does, without losing the output on error
+    prompt = rf"{re.escape(net_connect.base_prompt)}.*#"
+    rejection = None
+    net_connect.config_mode()
+    for cmd in commands:
+        output = net_connect.send_command(cmd, expect_string=prompt, read_timeout=read_timeout,
+                                          strip_prompt=False, strip_command=False)
+        transcript.append(output)
+        rejected = _ERROR_RE.search(output)
+        if rejected:
+            line = output[rejected.start():].strip().splitlines()[0]
+            rejection = f"{cmd.strip()!r}: {line[:200]}"
+            break
+    net_connect.exit_config_mode()
+    return rejection
+
+def apply_config_to_device(device_ip, username, password, commands, backup_dir, platform=DEFAULT_PLATFORM,
+                           max_output=MAX_OUTPUT_BYTES):
     """Apply configuration to a single device (thread-safe)"""
     device_result = {
         'device_ip': device_ip,
@@ -104,15 +336,18 @@ def apply_config_to_device(device_ip, username, password, commands, backup_dir,
     }
     
     device = {
-        'device_type': 'cisco_ios',
+        'device_type': platform,
         'ip': device_ip,
         'username': username,
         'password': password,
     }
     
+    net_connect = None
+    healthy = False
+    transcript = []
     try:
-        # Connect to device
-        net_connect = ConnectHandler(**device, timeout=30)
+        # Connect to device (or reuse a pooled session)
+        net_connect = POOL.get(device_ip, device)
         logging.info(f"Successfully connected to {device_ip}")
         
         # Backup configuration
@@ -120,111 +355,418 @@ def apply_config_to_device(device_ip, username, password, commands, backup_dir,
         
         # Apply configurations
         net_connect.enable()
-        net_connect.config_mode()
         
-        # Replace TACACS key placeholder with actual key
-        processed_commands = []
-        for cmd in commands:
-            if '<TACACS_KEY_PLACEHOLDER>' in cmd:
-                processed_cmd = cmd.replace('<TACACS_KEY_PLACEHOLDER>', tacacs_key)
-                processed_commands.append(processed_cmd)
-            else:
-                processed_commands.append(cmd)
-        
-        # Execute commands
-        for cmd in processed_commands:
-            logging.info(f"Applying command on {device_ip}: {cmd}")
-            result = net_connect.send_command(cmd.strip())
-            device_result['commands_executed'].append({
-                'command': cmd.strip(),
-                'output': result
-            })
-            
-            # Check for common error patterns
-            if any(error in result.lower() for error in ['invalid', 'error', 'failed']):
-                logging.warning(f"Possible error in command output on {device_ip}: {result}")
-        
-        net_connect.exit_config_mode()
+        # Execute all commands in one config-mode session (key already substituted in main)
+        logging.info(f"Applying {len(commands)} commands on {device_ip}: {commands}")
+        rejection = send_config_lines(net_connect, commands, transcript)
+        if rejection:
+            # A half-configured device gets no further commands and is not saved
+            raise RuntimeError(f"Command rejected on {device_ip}: {rejection}")
         
         # Save configuration
-        save_result = net_connect.send_command("write memory")
+        save_result = save_device_config(net_connect, platform)
         logging.info(f"Configuration saved on {device_ip}: {save_result}")
         
-        device_result['configs_applied'] = len(processed_commands)
+        device_result['configs_applied'] = len(commands)
         device_result['status'] = 'success'
+        healthy = True
         
-        net_connect.disconnect()
         logging.info(f"Successfully applied configuration to {device_ip}")
         
     except Exception as e:
         error_msg = f"Failed to apply configuration to {device_ip}: {e}"
         logging.error(error_msg)
         device_result['error'] = str(e)
+    finally:
+        if net_connect is not None:
+            POOL.release(net_connect, healthy=healthy)
+    
+    # Keep whatever the device printed, including the output up to a failure
+    if transcript:
+        device_result['commands_executed'].append({
+            'command': '\n'.join(commands[:len(transcript)]),
+            'output': cap_output('\n'.join(transcript), max_output)
+        })
     
     device_result['end_time'] = datetime.now().isoformat()
     return device_result
 
-# === Section 6: Save Push Results ===
-def save_push_results(push_results, results_dir):
-    """Save push results in multiple formats"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+# === Section 6: asyncssh Push (optional) ===
+async def _read_until(process, pattern, timeout=30):
+    """Read from an interactive shell until the buffer matches pattern"""
+    buffer = ''
+    while not pattern.search(buffer):
+        chunk = await asyncio.wait_for(process.stdout.read(65535), timeout)
+        if not chunk:
+            break
+        buffer += chunk
+    return buffer
+
+async def _run_shell_command(process, command, prompt_re, timeout=30):
+    """Send one exec command and return its output without echo and prompt"""
+    process.stdin.write(command + '\n')
+    output = await _read_until(process, prompt_re, timeout)
+    return '\n'.join(output.splitlines()[1:-1])
+
+async def apply_config_to_device_async(device_ip, semaphore, username, password, commands, backup_dir,
+                                       max_output=MAX_OUTPUT_BYTES):
+    """Apply configuration to a single device over asyncssh; same result record as the Netmiko path"""
+    device_result = {
+        'device_ip': device_ip,
+        'status': 'failed',
+        'start_time': None,
+        'end_time': None,
+        'backup_created': False,
+        'configs_applied': 0,
+        'error': None,
+        'commands_executed': []
+    }
+    
+    async with semaphore:
+        device_result['start_time'] = datetime.now().isoformat()
+        try:
+            async with asyncssh.connect(device_ip, username=username, password=password,
+                                        known_hosts=None, client_keys=None) as conn:
+                process = await conn.create_process(term_type='vt100')
+                prompt = (await _read_until(process, _PROMPT_RE)).strip().splitlines()[-1]
+                logging.info(f"Successfully connected to {device_ip}")
+                
+                # Enter enable mode if we landed in user exec (no enable secret, as with Netmiko's enable())
+                if prompt.endswith('>'):
+                    process.stdin.write("enable\n")
+                    output = await _read_until(process, re.compile(_PASSWORD_RE.pattern + '|' + _PROMPT_RE.pattern))
+                    if _PASSWORD_RE.search(output):
+                        process.stdin.write("\n")
+                        output = await _read_until(process, _PROMPT_RE)
+                    prompt = output.strip().splitlines()[-1]
+                if not prompt.endswith('#'):
+                    raise Exception(f"Could not enter enable mode. Final prompt: {prompt}")
+                exec_prompt_re = re.compile(re.escape(prompt) + r'\s*$')
+                
+                await _run_shell_command(process, "terminal length 0", exec_prompt_re)
+                
+                # Backup configuration
+                try:
+                    running_config = await _run_shell_command(process, "show running-config", exec_prompt_re, timeout=120)
+                    backup_filename = os.path.join(backup_dir, f"{device_ip}_backup.cfg")
+                    with open(backup_filename, 'w') as backup_file:
+                        backup_file.write(running_config)
+                    logging.info(f"Configuration backup created: {backup_filename}")
+                    device_result['backup_created'] = True
+                except Exception as e:
+                    logging.error(f"Failed to backup config for {device_ip}: {e}")
+                
+                # Apply the whole block in one write and wait for the exec prompt
+                process.stdin.write("configure terminal\n" + "\n".join(commands) + "\nend\n")
+                output = await _read_until(process, exec_prompt_re, timeout=60)
+                device_result['commands_executed'].append({
+                    'command': '\n'.join(commands),
+                    'output': cap_output(output, max_output)
+                })
+                # The block is already sent, but a rejected command still skips the save
+                if _ERROR_RE.search(output):
+                    line = next(line for line in output.splitlines() if _ERROR_RE.search(line))
+                    raise RuntimeError(f"Command rejected on {device_ip}: {line.strip()[:200]}")
+                
+                # Save configuration
+                save_result = await _run_shell_command(process, "write memory", exec_prompt_re, timeout=60)
+                logging.info(f"Configuration saved on {device_ip}: {save_result}")
+                
+                device_result['configs_applied'] = len(commands)
+                device_result['status'] = 'success'
+                
+                process.stdin.write("exit\n")
+                logging.info(f"Successfully applied configuration to {device_ip}")
+                
+        except Exception as e:
+            logging.error(f"Failed to apply configuration to {device_ip}: {e}")
+            device_result['error'] = str(e)
+        
+        device_result['end_time'] = datetime.now().isoformat()
+    return device_result
+
+async def push_all_async(remediation_data, username, password, backup_dir, concurrency, result_writer=None,
+                         report=True, max_output=MAX_OUTPUT_BYTES):
+    """Fan out over every device on one event loop, printing progress as devices finish"""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        apply_config_to_device_async(device_ip, semaphore, username, password,
+                                     data['remediation_commands'], backup_dir, max_output)
+        for device_ip, data in remediation_data.items()
+    ]
+    
+    push_results = []
+    failed = 0
+    for completed, task in enumerate(asyncio.as_completed(tasks), 1):
+        result = await task
+        push_results.append(result)
+        if result_writer is not None:
+            result_writer.write(result)
+        failed += result['status'] == 'failed'
+        if report:
+            report_progress(completed, len(tasks), failed, result)
+    return push_results
+
+class _QueueResultWriter:
+    """Hands each finished device back to the parent process as soon as it completes"""
+    
+    def __init__(self, result_queue):
+        self.result_queue = result_queue
+    
+    def write(self, result):
+        self.result_queue.put(result)
+
+def _init_shard_worker(log_queue):
+    """Process pool initializer: route this worker's log records to the parent's handlers"""
+    root = logging.getLogger()
+    # Drop handlers inherited through fork so records are not written twice
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+
+def _push_shard(shard, username, password, backup_dir, concurrency, result_queue, max_output):
+    """Process pool worker: push one shard of devices on its own event loop"""
+    # Progress and totals are reported by the parent, which sees every shard
+    asyncio.run(push_all_async(shard, username, password, backup_dir, concurrency,
+                               _QueueResultWriter(result_queue), report=False, max_output=max_output))
+
+def push_all_sharded(remediation_data, username, password, backup_dir, concurrency, result_writer, processes,
+                     max_output=MAX_OUTPUT_BYTES):
+    """Split the asyncssh push across processes so result handling is not bound to one GIL"""
+    items = list(remediation_data.items())
+    shards = [dict(items[i::processes]) for i in range(min(processes, len(items)))]
+    per_shard = max(1, concurrency // len(shards))
+    
+    # Only plain data crosses the process boundary; each worker opens its own sessions
+    # and streams finished devices and log records back through these queues
+    manager = multiprocessing.Manager()
+    result_queue = manager.Queue()
+    log_queue = manager.Queue()
+    listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    
+    push_results = []
+    failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_shard_worker,
+                                 initargs=(log_queue,)) as executor:
+            futures = [
+                executor.submit(_push_shard, shard, username, password, backup_dir, per_shard, result_queue,
+                                max_output)
+                for shard in shards
+            ]
+            while len(push_results) < len(items):
+                try:
+                    result = result_queue.get(timeout=1)
+                except queue.Empty:
+                    # A shard that died will never send the rest of its devices
+                    if all(future.done() for future in futures) and result_queue.empty():
+                        break
+                    continue
+                push_results.append(result)
+                result_writer.write(result)
+                failed += result['status'] == 'failed'
+                report_progress(len(push_results), len(items), failed, result)
+            for future in futures:
+                future.result()
+    finally:
+        listener.stop()
+        manager.shutdown()
+    return push_results
+
+def format_progress(completed, total, result):
+    """One progress line for a finished device"""
+    status_msg = f"[{completed}/{total}] {result['device_ip']}: {result['status'].upper()}"
+    if result['status'] == 'failed':
+        status_msg += f" - {result.get('error', 'Unknown error')}"
+    return status_msg
+
+def report_progress(completed, total, failed, result):
+    """Log the finished device and print a periodic summary instead of a line per device"""
+    logging.info(format_progress(completed, total, result))
+    if completed % PROGRESS_EVERY == 0 or completed == total:
+        print(f"Progress: {completed}/{total} devices done, {failed} failed")
+
+def push_all_threaded(remediation_data, username, password, backup_dir, thread_count, result_writer,
+                      max_output=MAX_OUTPUT_BYTES):
+    """Push to every device with a Netmiko worker thread per device"""
+    print(f"\n=== Starting Multi-threaded Configuration Push ===")
+    push_results = []
     
-    # Save as JSON (detailed format)
-    json_file = os.path.join(results_dir, f"push_results_{timestamp}.json")
-    with open(json_file, 'w') as f:
-        json.dump(push_results, f, indent=2)
+    # Create thread pool and execute
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        # Submit all tasks
+        future_to_device = {
+            executor.submit(
+                apply_config_to_device,
+                device_ip,
+                username,
+                password,
+                data['remediation_commands'],
+                backup_dir,
+                data.get('device_type', DEFAULT_PLATFORM),
+                max_output
+            ): device_ip
+            for device_ip, data in remediation_data.items()
+        }
+        
+        # Process completed tasks
+        completed = 0
+        failed = 0
+        for future in as_completed(future_to_device):
+            device_ip = future_to_device[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Thread execution failed for {device_ip}: {e}")
+                result = {
+                    'device_ip': device_ip,
+                    'status': 'failed',
+                    'error': str(e),
+                    'start_time': datetime.now().isoformat(),
+                    'end_time': datetime.now().isoformat(),
+                    'backup_created': False,
+                    'configs_applied': 0,
+                    'commands_executed': []
+                }
+            
+            push_results.append(result)
+            result_writer.write(result)
+            completed += 1
+            failed += result['status'] == 'failed'
+            report_progress(completed, len(remediation_data), failed, result)
     
-    # Save as CSV (summary format)
-    csv_file = os.path.join(results_dir, f"push_summary_{timestamp}.csv")
-    with open(csv_file, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Device IP', 'Status', 'Backup Created', 'Configs Applied', 'Start Time', 'End Time', 'Error'])
+    return push_results
+
+# === Section 7: Save Push Results ===
+def json_line(data):
+    """Serialize one result as a UTF-8 JSON line, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data) + b'\n'
+    return (json.dumps(data) + '\n').encode('utf-8')
+
+def load_remediation_file(path):
+    """Read the audit tool's remediation JSON in one call"""
+    with open(path, 'rb') as file:
+        raw = file.read()
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+class PushResultWriter:
+    """
+    Append each finished device to a JSONL log and the CSV summary as it completes,
+    so a crash mid-run keeps every result written so far
+    """
+    
+    CSV_HEADER = ['Device IP', 'Status', 'Backup Created', 'Configs Applied', 'Start Time', 'End Time', 'Error']
+    
+    def __init__(self, results_dir, timestamp, fsync_every=RESULT_FSYNC_EVERY):
+        self.jsonl_file = os.path.join(results_dir, f"push_results_{timestamp}.jsonl")
+        self.json_file = os.path.join(results_dir, f"push_results_{timestamp}.json")
+        self.csv_file = os.path.join(results_dir, f"push_summary_{timestamp}.csv")
+        self.fsync_every = fsync_every
+        self._count = 0
+        self._jsonl = open(self.jsonl_file, 'wb')
+        self._csv_fh = open(self.csv_file, 'w', newline='')
+        self._csv = csv.writer(self._csv_fh)
+        self._csv.writerow(self.CSV_HEADER)
+    
+    def write(self, result):
+        """Record one device result in both files"""
+        self._jsonl.write(json_line(result))
+        self._csv.writerow([
+            result['device_ip'],
+            result['status'],
+            result['backup_created'],
+            result['configs_applied'],
+            result['start_time'],
+            result['end_time'],
+            result.get('error', '')
+        ])
+        self._count += 1
+        if self._count % self.fsync_every == 0:
+            for fh in (self._jsonl, self._csv_fh):
+                fh.flush()
+                os.fsync(fh.fileno())
+    
+    def close(self):
+        """Close both files and wrap the JSONL lines into the JSON array file"""
+        self._jsonl.close()
+        self._csv_fh.close()
         
-        for result in push_results:
-            writer.writerow([
-                result['device_ip'],
-                result['status'],
-                result['backup_created'],
-                result['configs_applied'],
-                result['start_time'],
-                result['end_time'],
-                result.get('error', '')
-            ])
-    
-    logging.info(f"Push results saved to: {json_file}")
-    logging.info(f"Push summary saved to: {csv_file}")
-    
-    return json_file, csv_file
-
-# === Section 7: Main Push Function ===
+        # One pass over the JSONL lines; no re-serialization of the results
+        with open(self.jsonl_file, 'rb') as src, open(self.json_file, 'wb') as dst:
+            dst.write(b'[\n')
+            for i, line in enumerate(src):
+                dst.write((b',\n' if i else b'') + line.rstrip(b'\n'))
+            dst.write(b'\n]\n')
+        
+        logging.info(f"Push results saved to: {self.json_file} (per-device log: {self.jsonl_file})")
+        logging.info(f"Push summary saved to: {self.csv_file}")
+        return self.json_file, self.csv_file
+
+def parse_args():
+    """Parse command-line options; anything not given is prompted for"""
+    parser = argparse.ArgumentParser(description="PSN06 Config Push Tool (Multi-threaded)")
+    parser.add_argument("--remediation", help="Remediation JSON file written by the audit tool")
+    parser.add_argument("--user", help="SSH username")
+    parser.add_argument("--password-env", metavar="VAR",
+                        help="Read the SSH password from this environment variable instead of prompting")
+    parser.add_argument("--tacacs-key-env", metavar="VAR",
+                        help="Read the TACACS+ key from this environment variable instead of prompting")
+    parser.add_argument("--threads", type=int, help="Number of concurrent threads (default: 5; prompts when interactive)")
+    parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt")
+    parser.add_argument("--max-output-bytes", type=int, default=MAX_OUTPUT_BYTES, metavar="N",
+                        help=f"Command output kept per device in the results (default: {MAX_OUTPUT_BYTES}, 0 = unlimited)")
+    args = parser.parse_args()
+    if args.max_output_bytes < 0:
+        parser.error("--max-output-bytes must be 0 or more")
+    return args
+
+def secret_from_env(var, prompt):
+    """Return the named environment variable if it is set, otherwise prompt for it"""
+    if var and os.environ.get(var):
+        return os.environ[var]
+    return getpass(prompt)
+
+def pick_file(title, filetypes):
+    """Show a file dialog and tear Tk down again before the push starts"""
+    # Imported here so headless runs never load tkinter
+    import tkinter as tk
+    from tkinter import filedialog
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        return filedialog.askopenfilename(title=title, filetypes=filetypes)
+    finally:
+        root.destroy()
+
+# === Section 8: Main Push Function ===
 def main():
-    # Setup logging
-    log_filename = setup_logging()
-    logging.info("=== PSN06 Config Push Tool Started (Multi-threaded) ===")
+    args = parse_args()
     
-    # Create results and backup directories
-    results_dir = create_results_dir()
-    backup_dir = create_backup_dir()
+    # Create log, results and backup directories, then setup logging
+    log_filename, results_dir, backup_dir, run_timestamp = prepare_run_dirs()
+    setup_logging(log_filename)
+    logging.info("=== PSN06 Config Push Tool Started (Multi-threaded) ===")
     logging.info(f"Results directory created: {results_dir}")
     logging.info(f"Backup directory created: {backup_dir}")
     
     # Prompt for SSH Credentials
     print("=== PSN06 Config Push Tool (Multi-threaded) ===")
-    username = input("Enter your SSH username: ")
-    password = getpass("Enter your SSH password: ")
+    username = args.user or input("Enter your SSH username: ")
+    password = secret_from_env(args.password_env, "Enter your SSH password: ")
     
     # Prompt for TACACS key
     print("\nTACACS+ Configuration:")
-    tacacs_key = getpass("Enter the TACACS+ key: ")
+    tacacs_key = secret_from_env(args.tacacs_key_env, "Enter the TACACS+ key: ")
     
-    # File Explorer to Select Remediation File
-    print("\nPlease select the remediation JSON file from the audit tool.")
-    root = tk.Tk()
-    root.withdraw()
-    remediation_file_path = filedialog.askopenfilename(
-        title="Select Remediation JSON File", 
-        filetypes=[("JSON Files", "*.json")]
-    )
+    # Remediation file from the command line, or a file dialog when run interactively
+    if args.remediation:
+        remediation_file_path = args.remediation
+    elif sys.stdin.isatty():
+        print("\nPlease select the remediation JSON file from the audit tool.")
+        remediation_file_path = pick_file("Select Remediation JSON File", [("JSON Files", "*.json")])
+    else:
+        remediation_file_path = None
     
     if not remediation_file_path:
         logging.error("No remediation file selected. Exiting.")
@@ -232,8 +774,7 @@ def main():
     
     # Load Remediation Data
     try:
-        with open(remediation_file_path, 'r') as file:
-            remediation_data = json.load(file)
+        remediation_data = load_remediation_file(remediation_file_path)
         logging.info(f"Loaded remediation data for {len(remediation_data)} devices")
     except Exception as e:
         logging.error(f"Failed to read remediation file: {e}")
@@ -243,15 +784,30 @@ def main():
         print("No devices need configuration updates.")
         return
     
+    # Substitute the TACACS key once for the whole run, not per device
+    expand_remediation_commands(remediation_data, tacacs_key)
+    
     # Get thread count
     print(f"\nFound {len(remediation_data)} devices that need configuration updates.")
-    max_threads = min(len(remediation_data), 10)  # Cap at 10 threads
-    
-    while True:
+    max_threads = min(len(remediation_data), MAX_THREADS)
+    default_threads = min(5, max_threads)
+    unattended = args.yes or not sys.stdin.isatty()
+    use_async = USE_ASYNCSSH and ASYNCSSH_AVAILABLE
+    
+    if args.threads is not None and not use_async:
+        if not 1 <= args.threads <= max_threads:
+            logging.error(f"--threads must be between 1 and {max_threads}. Exiting.")
+            return
+        thread_count = args.threads
+    elif not use_async and unattended:
+        # Nobody is there to answer the prompt, so take the default
+        thread_count = default_threads
+    
+    while not use_async and args.threads is None and not unattended:
         try:
-            thread_count = input(f"Enter number of concurrent threads (1-{max_threads}) [default: 5]: ").strip()
+            thread_count = input(f"Enter number of concurrent threads (1-{max_threads}) [default: {default_threads}]: ").strip()
             if not thread_count:
-                thread_count = 5
+                thread_count = default_threads
             else:
                 thread_count = int(thread_count)
             
@@ -265,64 +821,39 @@ def main():
     # Confirmation
     print(f"\n=== CONFIGURATION PUSH SUMMARY ===")
     print(f"Devices to configure: {len(remediation_data)}")
-    print(f"Concurrent threads: {thread_count}")
+    if use_async:
+        thread_count = min(len(remediation_data), ASYNC_CONCURRENCY)
+        print(f"Concurrent sessions (asyncssh): {thread_count}")
+    else:
+        print(f"Concurrent threads: {thread_count}")
+        logging.info(f"Using {thread_count} threads (maximum {max_threads})")
     print(f"Backup directory: {backup_dir}")
     
-    confirm = input("\nDo you want to proceed with the configuration push? (yes/no): ").strip().lower()
+    confirm = 'yes' if args.yes else input("\nDo you want to proceed with the configuration push? (yes/no): ").strip().lower()
     if confirm not in ['yes', 'y']:
         print("Configuration push cancelled.")
         return
     
-    # Execute multi-threaded configuration push
-    print(f"\n=== Starting Multi-threaded Configuration Push ===")
-    push_results = []
-    
-    # Create thread pool and execute
-    with ThreadPoolExecutor(max_workers=thread_count) as executor:
-        # Submit all tasks
-        future_to_device = {
-            executor.submit(
-                apply_config_to_device,
-                device_ip,
-                username,
-                password,
-                data['remediation_commands'],
-                backup_dir,
-                tacacs_key
-            ): device_ip
-            for device_ip, data in remediation_data.items()
-        }
-        
-        # Process completed tasks
-        completed = 0
-        for future in as_completed(future_to_device):
-            device_ip = future_to_device[future]
-            try:
-                result = future.result()
-                push_results.append(result)
-                completed += 1
-                
-                status_msg = f"[{completed}/{len(remediation_data)}] {device_ip}: {result['status'].upper()}"
-                if result['status'] == 'failed':
-                    status_msg += f" - {result.get('error', 'Unknown error')}"
-                
-                print(status_msg)
-                
-            except Exception as e:
-                logging.error(f"Thread execution failed for {device_ip}: {e}")
-                push_results.append({
-                    'device_ip': device_ip,
-                    'status': 'failed',
-                    'error': str(e),
-                    'start_time': datetime.now().isoformat(),
-                    'end_time': datetime.now().isoformat(),
-                    'backup_created': False,
-                    'configs_applied': 0,
-                    'commands_executed': []
-                })
-    
-    # Save push results
-    json_file, csv_file = save_push_results(push_results, results_dir)
+    # Results are written as each device finishes
+    result_writer = PushResultWriter(results_dir, run_timestamp)
+    try:
+        if use_async and ASYNC_PROCESSES > 1:
+            print(f"\n=== Starting asyncssh Configuration Push ({ASYNC_PROCESSES} processes) ===")
+            push_results = push_all_sharded(remediation_data, username, password, backup_dir, thread_count,
+                                            result_writer, ASYNC_PROCESSES, args.max_output_bytes)
+        elif use_async:
+            print(f"\n=== Starting asyncssh Configuration Push ===")
+            push_results = asyncio.run(
+                push_all_async(remediation_data, username, password, backup_dir, thread_count, result_writer,
+                               max_output=args.max_output_bytes)
+            )
+        else:
+            push_results = push_all_threaded(remediation_data, username, password, backup_dir, thread_count,
+                                             result_writer, args.max_output_bytes)
+    finally:
+        # Disconnect pooled sessions even if the push was interrupted
+        POOL.close_all()
+        json_file, csv_file = result_writer.close()
     
     # Calculate statistics
     successful_pushes = sum(1 for result in push_results if result['status'] == 'success')
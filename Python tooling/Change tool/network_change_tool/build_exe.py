@@ -4,21 +4,51 @@ Build script for creating Windows executable
 """
 
 import os
+import re
 import sys
+import argparse
 import shutil
 import subprocess
+import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import json
+from importlib import metadata
+
+# Files and trees bundled by the spec; a change to any of them forces a rebuild
+STAMP_FILES = ['network_change_tool.spec', 'app.py', 'main.py', 'requirements.txt',
+               'README.md', 'SETUP_GUIDE.md', 'setup_credentials.py']
+STAMP_TREES = ['src', 'configs', 'examples']
+
+# Threads used to delete old build output; deletion is bound by per-file syscall latency
+RMTREE_WORKERS = 16
+
+# The spec passes optimize= to Analysis, which PyInstaller only accepts from 6.6
+PYINSTALLER_MIN_VERSION = (6, 6)
+
+def _installed_version(dist):
+    """Return the installed (major, minor) of a distribution, or None if missing"""
+    # Read the metadata rather than importing, so an upgrade below is picked up
+    # by the in-process build
+    try:
+        version = metadata.version(dist)
+    except metadata.PackageNotFoundError:
+        return None
+    return tuple(int(part) for part in re.findall(r'\d+', version)[:2])
 
 def check_requirements():
     """Check if required packages are installed"""
-    try:
-        import PyInstaller
+    minimum = '.'.join(map(str, PYINSTALLER_MIN_VERSION))
+    version = _installed_version("pyinstaller")
+    if version is not None and version >= PYINSTALLER_MIN_VERSION:
         print("✓ PyInstaller is installed")
-    except ImportError:
+        return
+    if version is None:
         print("✗ PyInstaller not found. Installing...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller"])
-        print("✓ PyInstaller installed")
+    else:
+        print(f"✗ PyInstaller {'.'.join(map(str, version))} is older than {minimum}. Upgrading...")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", f"pyinstaller>={minimum}"])
+    print("✓ PyInstaller installed")
 
 def create_pyinstaller_spec():
     """Create PyInstaller spec file"""
@@ -27,8 +57,6 @@ def create_pyinstaller_spec():
 import sys
 from pathlib import Path
 
-block_cipher = None
-
 # Define paths
 src_path = Path.cwd() / 'src'
 configs_path = Path.cwd() / 'configs'
@@ -83,14 +111,14 @@ a = Analysis(
     hooksconfig={},
     runtime_hooks=[],
     excludes=[],
-    win_no_prefer_redirects=False,
-    win_private_assemblies=False,
-    cipher=block_cipher,
     noarchive=False,
+    # Bytecode compiled as with -OO (no asserts or docstrings); use 1 if a bundled
+    # package turns out to need its docstrings at runtime
+    optimize=2,
 )
 
 # GUI application
-pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+pyz = PYZ(a.pure, a.zipped_data)
 
 exe = EXE(
     pyz,
@@ -368,6 +396,83 @@ def create_icon():
     
     print("✓ Icon placeholder created")
 
+def _fast_rmtree(path):
+    """Delete a build output tree, unlinking its files in parallel"""
+    path = Path(path)
+    if not path.exists():
+        return
+    
+    # Native rmdir is much faster than a Python walk on Windows
+    if os.name == 'nt':
+        subprocess.run(['cmd', '/c', 'rmdir', '/S', '/Q', str(path)], capture_output=True)
+        if not path.exists():
+            return
+    
+    # Walk the tree once, then unlink every file across the pool
+    files, dirs = [], []
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        dirs.append(current)
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    files.append(entry.path)
+    
+    with ThreadPoolExecutor(max_workers=RMTREE_WORKERS) as executor:
+        list(executor.map(os.unlink, files))
+    
+    # Parents are listed before their children, so remove directories in reverse
+    for directory in reversed(dirs):
+        os.rmdir(directory)
+
+def _build_cache_key():
+    """Hash the inputs that invalidate PyInstaller's Analysis cache"""
+    digest = hashlib.sha1()
+    for name in ('network_change_tool.spec', 'requirements.txt'):
+        if Path(name).exists():
+            digest.update(Path(name).read_bytes())
+    return digest.hexdigest()[:12]
+
+def _source_stamp():
+    """BLAKE2 digest over everything the build bundles, in a stable order"""
+    paths = [Path(name) for name in STAMP_FILES]
+    for tree in STAMP_TREES:
+        paths.extend(sorted(p for p in Path(tree).rglob('*')
+                            if p.is_file() and '__pycache__' not in p.parts))
+    
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        if path.is_file():
+            digest.update(str(path).encode('utf-8'))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def _run_pyinstaller(args):
+    """Run PyInstaller in this interpreter rather than spawning a second one"""
+    import PyInstaller.__main__
+    try:
+        PyInstaller.__main__.run(args)
+    except SystemExit as e:
+        # PyInstaller exits instead of returning on failure
+        return e.code in (None, 0)
+    return True
+
+def _stage_dist_files(dist_dir):
+    """Hardlink the launchers and setup script into dist, copying only across volumes"""
+    for name in ['launch.bat', 'setup.bat', 'gui.bat', 'cli.bat', 'setup_tool.py']:
+        if not Path(name).exists():
+            continue
+        target = dist_dir / name
+        if target.exists():
+            target.unlink()
+        try:
+            os.link(name, target)
+        except OSError:
+            shutil.copy2(name, target)
+
 def build_executable():
     """Build the executable using PyInstaller"""
     print("\n" + "=" * 50)
@@ -375,33 +480,34 @@ def build_executable():
     print("=" * 50)
     
     try:
-        # Clean previous builds
-        if Path('dist').exists():
-            shutil.rmtree('dist')
-        if Path('build').exists():
-            shutil.rmtree('build')
-        
-        # Build using spec file
-        subprocess.run([
-            sys.executable, '-m', 'PyInstaller',
-            '--clean',
-            '--noconfirm',
-            'network_change_tool.spec'
-        ], check=True)
+        workpath = Path(f"build-{_build_cache_key()}")
+        stamp_file = workpath / '.stamp'
+        stamp = _source_stamp()
+        exe_path = Path('dist/NetworkChangeTool/NetworkChangeTool.exe')
         
-        print("✓ Executable built successfully")
+        if exe_path.exists() and stamp_file.exists() and stamp_file.read_text() == stamp:
+            print("✓ Sources unchanged since the last build, skipping PyInstaller")
+        else:
+            # Clean previous output; build work directories are kept per spec/requirements
+            # hash so PyInstaller can reuse its Analysis cache until either file changes
+            _fast_rmtree('dist')
+            for stale in Path('.').glob('build-*'):
+                if stale.is_dir() and stale != workpath:
+                    _fast_rmtree(stale)
+            
+            # Build using spec file
+            if not _run_pyinstaller(['--noconfirm', '--workpath', str(workpath), 'network_change_tool.spec']):
+                print("✗ Build failed: PyInstaller reported an error")
+                return False
+            stamp_file.write_text(stamp)
+            
+            print("✓ Executable built successfully")
         
         # Copy additional files to dist
         dist_dir = Path('dist/NetworkChangeTool')
         
-        # Copy batch files
-        for bat_file in ['launch.bat', 'setup.bat', 'gui.bat', 'cli.bat']:
-            if Path(bat_file).exists():
-                shutil.copy2(bat_file, dist_dir)
-        
-        # Copy setup script
-        if Path('setup_tool.py').exists():
-            shutil.copy2('setup_tool.py', dist_dir)
+        # Batch files and setup script
+        _stage_dist_files(dist_dir)
         
         print("✓ Additional files copied to distribution")
         
@@ -427,16 +533,12 @@ Files:
 For help and documentation, see the configs/ directory after setup.
 """
         
-        with open(dist_dir / 'README.txt', 'w') as f:
-            f.write(dist_readme)
+        (dist_dir / 'README.txt').write_bytes(dist_readme.encode('utf-8'))
         
         print("✓ Distribution README created")
         
         return True
         
-    except subprocess.CalledProcessError as e:
-        print(f"✗ Build failed: {e}")
-        return False
     except Exception as e:
         print(f"✗ Unexpected error: {e}")
         return False
@@ -537,8 +639,7 @@ Section "Uninstall"
 SectionEnd
 """
     
-    with open('installer.nsi', 'w') as f:
-        f.write(nsis_content)
+    Path('installer.nsi').write_bytes(nsis_content.encode('utf-8'))
     
     print("✓ NSIS installer script created")
 
@@ -554,9 +655,9 @@ def create_build_instructions():
    pip install -r requirements.txt
    ```
 
-2. **PyInstaller** (installed automatically by build script):
+2. **PyInstaller 6.6+** (installed automatically by build script):
    ```bash
-   pip install pyinstaller
+   pip install "pyinstaller>=6.6"
    ```
 
 3. **Optional: UPX** for smaller executable size:
@@ -570,6 +671,8 @@ def create_build_instructions():
 python build_exe.py
 ```
 
+Pass `--build` (or `--yes`) to skip the confirmation prompt in CI.
+
 ### Manual Build Steps
 
 1. **Check requirements and create spec file:**
@@ -691,13 +794,34 @@ console=True
    - Include all necessary runtime libraries
 """
     
-    with open('BUILD_INSTRUCTIONS.md', 'w') as f:
-        f.write(instructions)
+    Path('BUILD_INSTRUCTIONS.md').write_bytes(instructions.encode('utf-8'))
     
     print("✓ Build instructions created")
 
+def _tree_size(path):
+    """Total size of every file under path, using the sizes scandir already returned"""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Network Change Tool - Executable Builder")
+    parser.add_argument("--build", "--yes", "-y", dest="build", action="store_true",
+                        help="Build the executable without asking")
+    return parser.parse_args()
+
 def main():
     """Main build function"""
+    args = parse_args()
+    
     print("Network Change Tool - Executable Builder")
     print("=" * 50)
     
@@ -721,7 +845,7 @@ def main():
     print("=" * 50)
     
     # Ask if user wants to build now
-    response = input("\nBuild executable now? (y/n): ")
+    response = 'y' if args.build else input("\nBuild executable now? (y/n): ")
     if response.lower() == 'y':
         success = build_executable()
         
@@ -738,6 +862,8 @@ def main():
             if exe_path.exists():
                 size_mb = exe_path.stat().st_size / (1024 * 1024)
                 print(f"Executable size: {size_mb:.1f} MB")
+                dist_mb = _tree_size(exe_path.parent) / (1024 * 1024)
+                print(f"Distribution size: {dist_mb:.1f} MB")
         else:
             print("\n✗ Build failed. Check the error messages above.")
     else:
@@ -7,110 +7,145 @@ Alternative to command-line PyInstaller
 import sys
 import subprocess
 import os
+import shutil
+import importlib.util
+import json
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Packages the GUI builder needs: import name -> pip name
+BUILDER_PACKAGES = {
+    "auto_py_to_exe": "auto-py-to-exe",
+    "PyInstaller": "pyinstaller",
+}
+
+# Local wheel cache used instead of the package index when present
+WHEEL_DIR = Path(".wheels")
+
+# auto-py-to-exe settings; the icon entry is added at build time when assets/icon.ico exists
+BUILD_CONFIG = {
+    "version": "auto-py-to-exe-configuration_v1",
+    "pyinstallerOptions": [
+        {
+            "optionDest": "noconfirm",
+            "value": True
+        },
+        {
+            "optionDest": "filenames",
+            "value": ["app.py"]
+        },
+        {
+            "optionDest": "onefile",
+            "value": False
+        },
+        {
+            "optionDest": "console",
+            "value": True
+        },
+        {
+            "optionDest": "name",
+            "value": "NetworkChangeTool"
+        },
+        {
+            "optionDest": "add_data",
+            "value": [
+                "src;src",
+                "configs;configs",
+                "examples;examples",
+                "requirements.txt;.",
+                "README.md;.",
+                "SETUP_GUIDE.md;.",
+                "setup_credentials.py;."
+            ]
+        },
+        {
+            "optionDest": "hidden_import",
+            "value": [
+                "PyQt6",
+                "PyQt6.QtWidgets",
+                "PyQt6.QtCore",
+                "PyQt6.QtGui",
+                "netmiko",
+                "paramiko",
+                "pan-os-python",
+                "panos",
+                "pandas",
+                "openpyxl",
+                "xlrd",
+                "keyring",
+                "cryptography",
+                "jinja2",
+                "yaml",
+                "pydantic",
+                "requests",
+                "python-nmap",
+                "pysnmp",
+                "loguru",
+                "rich",
+                "tqdm",
+                "schedule",
+                "colorama",
+                "bcrypt",
+                "pycryptodome",
+                "jsonschema",
+                "python-dotenv",
+                "pyqtgraph"
+            ]
+        }
+    ]
+}
+
+def pip_install(packages):
+    """Install all packages in one installer run (uv when available, otherwise pip)"""
+    uv = shutil.which("uv")
+    if uv:
+        cmd = [uv, "pip", "install", "--python", sys.executable]
+    else:
+        cmd = [sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "--no-input"]
+    if WHEEL_DIR.is_dir():
+        cmd += ["--find-links", str(WHEEL_DIR), "--no-index"]
+    subprocess.run(cmd + list(packages), check=True)
+
 def install_auto_py_to_exe():
-    """Install auto-py-to-exe if not already installed"""
-    try:
-        import auto_py_to_exe
+    """Install auto-py-to-exe (and PyInstaller) if not already installed"""
+    missing = [pip_name for module, pip_name in BUILDER_PACKAGES.items()
+               if importlib.util.find_spec(module) is None]
+    if not missing:
         print("✓ auto-py-to-exe is already installed")
         return True
-    except ImportError:
-        print("Installing auto-py-to-exe...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "auto-py-to-exe"])
-            print("✓ auto-py-to-exe installed successfully")
-            return True
-        except subprocess.CalledProcessError:
-            print("✗ Failed to install auto-py-to-exe")
-            return False
+    
+    print(f"Installing {', '.join(missing)}...")
+    try:
+        pip_install(missing)
+        print(f"✓ {', '.join(missing)} installed successfully")
+        return True
+    except (subprocess.CalledProcessError, OSError):
+        print(f"✗ Failed to install {', '.join(missing)}")
+        return False
 
 def create_build_config():
     """Create a build configuration file for auto-py-to-exe"""
-    config = {
-        "version": "auto-py-to-exe-configuration_v1",
-        "pyinstallerOptions": [
-            {
-                "optionDest": "noconfirm",
-                "value": True
-            },
-            {
-                "optionDest": "filenames",
-                "value": ["app.py"]
-            },
-            {
-                "optionDest": "onefile",
-                "value": False
-            },
-            {
-                "optionDest": "console",
-                "value": True
-            },
-            {
-                "optionDest": "name",
-                "value": "NetworkChangeTool"
-            },
-            {
-                "optionDest": "add_data",
-                "value": [
-                    "src;src",
-                    "configs;configs",
-                    "examples;examples",
-                    "requirements.txt;.",
-                    "README.md;.",
-                    "SETUP_GUIDE.md;.",
-                    "setup_credentials.py;."
-                ]
-            },
-            {
-                "optionDest": "hidden_import",
-                "value": [
-                    "PyQt6",
-                    "PyQt6.QtWidgets",
-                    "PyQt6.QtCore",
-                    "PyQt6.QtGui",
-                    "netmiko",
-                    "paramiko",
-                    "pan-os-python",
-                    "panos",
-                    "pandas",
-                    "openpyxl",
-                    "xlrd",
-                    "keyring",
-                    "cryptography",
-                    "jinja2",
-                    "yaml",
-                    "pydantic",
-                    "requests",
-                    "python-nmap",
-                    "pysnmp",
-                    "loguru",
-                    "rich",
-                    "tqdm",
-                    "schedule",
-                    "colorama",
-                    "bcrypt",
-                    "pycryptodome",
-                    "jsonschema",
-                    "python-dotenv",
-                    "pyqtgraph"
-                ]
-            }
-        ]
-    }
+    config = BUILD_CONFIG
     
     # Add icon if it exists
     icon_path = Path("assets/icon.ico")
     if icon_path.exists():
-        config["pyinstallerOptions"].append({
+        config = dict(BUILD_CONFIG, pyinstallerOptions=BUILD_CONFIG["pyinstallerOptions"] + [{
             "optionDest": "icon_file",
             "value": str(icon_path)
-        })
+        }])
     
     # Save configuration
-    import json
-    with open("build_config.json", "w") as f:
-        json.dump(config, f, indent=2)
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(config, indent=2).encode("utf-8")
+    Path("build_config.json").write_bytes(payload)
     
     print("✓ Build configuration created: build_config.json")
     return True
@@ -3,7 +3,7 @@
 Create example Excel file for device import
 """
 
-import pandas as pd
+from collections import defaultdict
 from pathlib import Path
 
 # Create sample device data
@@ -24,38 +24,48 @@ devices_data = [
     {"hostname": "router-02", "ip_address": "192.168.1.31", "device_type": "cisco_ios", "port": 22, "location": "datacenter", "role": "gateway"}
 ]
 
-# Create DataFrame
-df = pd.DataFrame(devices_data)
+COLUMNS = ["hostname", "ip_address", "device_type", "port", "location", "role"]
+SIMPLE_COLUMNS = ["hostname", "ip_address", "device_type", "port"]
 
-# Create Excel file with multiple sheets
-output_path = Path("./examples/device_list.xlsx")
-output_path.parent.mkdir(parents=True, exist_ok=True)
+def write_workbook(path, sheets):
+    """Stream each (sheet name, columns, rows) straight into a write-only workbook"""
+    # Imported here so importing this module does not load openpyxl
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    for sheet_name, columns, rows in sheets:
+        ws = wb.create_sheet(sheet_name)
+        ws.append(columns)
+        for row in rows:
+            ws.append([row[column] for column in columns])
+    wb.save(path)
 
-with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-    # Main device list
-    df.to_excel(writer, sheet_name='Devices', index=False)
+def main():
+    """Write the example device workbooks"""
+    # Group devices by role in one pass
+    by_role = defaultdict(list)
+    for device in devices_data:
+        by_role[device['role']].append(device)
     
-    # Core switches only
-    core_switches = df[df['role'] == 'core']
-    core_switches.to_excel(writer, sheet_name='Core_Switches', index=False)
+    # Create Excel file with multiple sheets
+    output_path = Path("./examples/device_list.xlsx")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Firewalls only
-    firewalls = df[df['role'] == 'security']
-    firewalls.to_excel(writer, sheet_name='Firewalls', index=False)
+    write_workbook(output_path, [
+        ('Devices', COLUMNS, devices_data),               # Main device list
+        ('Core_Switches', COLUMNS, by_role['core']),       # Core switches only
+        ('Firewalls', COLUMNS, by_role['security']),       # Firewalls only
+        ('Access_Switches', COLUMNS, by_role['access']),   # Access switches only
+    ])
     
-    # Access switches only
-    access_switches = df[df['role'] == 'access']
-    access_switches.to_excel(writer, sheet_name='Access_Switches', index=False)
-
-print(f"Created Excel file: {output_path}")
-print(f"Sheets: Devices, Core_Switches, Firewalls, Access_Switches")
-print(f"Total devices: {len(df)}")
-
-# Also create a simple version with just required columns
-simple_df = df[['hostname', 'ip_address', 'device_type', 'port']]
-simple_path = Path("./examples/device_list_simple.xlsx")
-
-with pd.ExcelWriter(simple_path, engine='openpyxl') as writer:
-    simple_df.to_excel(writer, sheet_name='Devices', index=False)
+    print(f"Created Excel file: {output_path}")
+    print(f"Sheets: Devices, Core_Switches, Firewalls, Access_Switches")
+    print(f"Total devices: {len(devices_data)}")
+    
+    # Also create a simple version with just required columns
+    simple_path = Path("./examples/device_list_simple.xlsx")
+    write_workbook(simple_path, [('Devices', SIMPLE_COLUMNS, devices_data)])
+    
+    print(f"Created simple Excel file: {simple_path}")
 
-print(f"Created simple Excel file: {simple_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@ import sys
 import os
 import getpass
 from pathlib import Path
-import json
 import yaml
 import csv
 import pandas as pd
@@ -19,7 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.core.credential_manager import CredentialManager, CredentialSource
 from src.core.device_discovery import DeviceDiscovery, DiscoveryMethod, DiscoveredDevice
-from src.core.config import AppConfig, DeviceConfig, DeviceCredentials
+from src.core.config import AppConfig, DeviceConfig, DeviceCredentials, load_config_data
 
 
 def setup_master_password():
@@ -224,26 +223,46 @@ def import_devices_from_excel_file():
         device_type_col = columns[int(device_type_col) - 1] if device_type_col.isdigit() else None
         port_col = columns[int(port_col) - 1] if port_col.isdigit() else None
         
-        # Process rows
-        for index, row in df.iterrows():
-            try:
-                hostname = str(row[hostname_col]).strip() if hostname_col else f"device-{index}"
-                ip_address = str(row[ip_col]).strip() if ip_col else None
-                device_type = str(row[device_type_col]).strip() if device_type_col else 'cisco_ios'
-                port = int(row[port_col]) if port_col and pd.notna(row[port_col]) else 22
-                
-                if ip_address and ip_address != 'nan':
-                    device = DiscoveredDevice(
-                        ip_address=ip_address,
-                        hostname=hostname,
-                        device_type=device_type,
-                        ports_open=[port],
-                        confidence=1.0
-                    )
-                    devices.append(device)
-                    
-            except Exception as e:
-                print(f"Warning: Error processing row {index + 1}: {e}")
+        # Convert whole columns at once instead of row by row
+        if not ip_col:
+            print("No IP address column selected")
+            return []
+        ip_addresses = df[ip_col].astype(str).str.strip()
+        if hostname_col:
+            hostnames = df[hostname_col].astype(str).str.strip()
+        else:
+            hostnames = pd.Series("device-" + df.index.astype(str), index=df.index)
+        if device_type_col:
+            device_types = df[device_type_col].astype(str).str.strip()
+        else:
+            device_types = pd.Series("cisco_ios", index=df.index)
+        if port_col:
+            ports = pd.to_numeric(df[port_col], errors='coerce')
+            bad_ports = df[port_col].notna() & ports.isna()
+            for index in df.index[bad_ports]:
+                print(f"Warning: Error processing row {index + 1}: invalid port {df.at[index, port_col]!r}")
+            ports = ports.fillna(22).astype(int)
+        else:
+            ports = pd.Series(22, index=df.index)
+            bad_ports = pd.Series(False, index=df.index)
+        
+        # Keep rows with an IP address and a usable port
+        keep = ip_addresses.ne('nan') & ip_addresses.ne('') & ~bad_ports
+        devices = [
+            DiscoveredDevice(
+                ip_address=ip_address,
+                hostname=hostname,
+                device_type=device_type,
+                ports_open=[port],
+                confidence=1.0
+            )
+            for ip_address, hostname, device_type, port in zip(
+                ip_addresses[keep].tolist(),
+                hostnames[keep].tolist(),
+                device_types[keep].tolist(),
+                ports[keep].tolist()
+            )
+        ]
     
     except Exception as e:
         print(f"Error reading Excel file: {e}")
@@ -320,14 +339,10 @@ def import_from_existing_config():
     devices = []
     
     try:
-        with open(config_path, 'r') as f:
-            if config_path.suffix.lower() in ['.yaml', '.yml']:
-                config = yaml.safe_load(f)
-            elif config_path.suffix.lower() == '.json':
-                config = json.load(f)
-            else:
-                print("Unsupported configuration file format. Use YAML or JSON.")
-                return []
+        if config_path.suffix.lower() not in ['.yaml', '.yml', '.json']:
+            print("Unsupported configuration file format. Use YAML or JSON.")
+            return []
+        config = load_config_data(config_path)
         
         # Extract devices from configuration
         config_devices = config.get('devices', [])
@@ -1,11 +1,39 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 from pathlib import Path
+import copy
 import yaml
 import json
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
+# libyaml's C loader when PyYAML was built with it; same safe semantics, much faster
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+@lru_cache(maxsize=32)
+def _load_config_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Parse a config file; the stat fields in the key drop stale entries when the file changes"""
+    suffix = Path(path).suffix.lower()
+    with open(path, 'r') as f:
+        if suffix in ['.yaml', '.yml']:
+            return yaml.load(f, Loader=YamlLoader)
+        elif suffix == '.json':
+            return json.load(f)
+    raise ValueError(f"Unsupported config file format: {suffix}")
+
+
+def load_config_data(config_path: Path) -> Dict[str, Any]:
+    """Load a YAML or JSON config file, reusing the parsed data while the file is unchanged"""
+    stat = config_path.stat()
+    data = _load_config_cached(str(config_path.resolve()), stat.st_mtime_ns, stat.st_size)
+    # Callers get their own copy so the cached parse is never mutated
+    return copy.deepcopy(data)
+
 
 class DeviceCredentials(BaseModel):
     username: str
@@ -89,14 +117,7 @@ class AppConfig(BaseModel):
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
         
-        with open(config_path, 'r') as f:
-            if config_path.suffix in ['.yaml', '.yml']:
-                data = yaml.safe_load(f)
-            elif config_path.suffix == '.json':
-                data = json.load(f)
-            else:
-                raise ValueError(f"Unsupported config file format: {config_path.suffix}")
-        
+        data = load_config_data(config_path)
         return cls(**data)
     
     def save_to_file(self, config_path: Path):
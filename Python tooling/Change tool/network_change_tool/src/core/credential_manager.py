@@ -439,9 +439,10 @@ def migrate_credentials_from_config(config_file: Path,
                                   encrypt: bool = True):
     """Migrate credentials from configuration file to secure storage"""
     import yaml
+    from .config import YamlLoader
     
     with open(config_file, 'r') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=YamlLoader)
     
     devices = config.get('devices', [])
     